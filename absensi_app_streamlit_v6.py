@@ -1,9 +1,32 @@
+import collections
+import cProfile
+import concurrent.futures
+import hashlib
+import io
+import os
+
 import streamlit as st
 import pandas as pd
 from datetime import datetime
 import plotly.express as px
 import plotly.graph_objects as go
 
+from rekap import (
+    DEFAULT_ROLE_SETTINGS, Period, add_dates, classify_parsed, jam_ke_menit, menit_ke_jam, merge_recaps, prepare_sheet,
+    prepared_debug, recap_prepared
+)
+from rekap.background import ParseJob
+from rekap.distribution import QUANTILES, WEEKDAYS, merge_histograms, punch_histogram, punch_quantiles
+from rekap.export import report_xlsx, summary_metrics
+from rekap.incremental import load_state, save_state, update_recap
+from rekap.performance import performance_css, performance_labels, style_performance
+from rekap.profiling import StageTimer, format_profile
+from rekap.progress import ProgressReporter, format_progress
+from rekap.reader import sheet_names
+from rekap.reporting import REPORT_WINDOWS, multi_month_report, report_window
+from rekap.store import latest_entries, read_index, store_sheet
+from rekap.sweep import merge_sweeps, threshold_sweep
+
 # Page configuration
 st.set_page_config(
     page_title="Smart Attendance Monitor",
@@ -80,17 +103,85 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+# Cache sizes: every rerun (filter clicks, tab switches, toggles) hits these
+# instead of re-reading the workbook; old entries are evicted by LRU and TTL.
+CACHE_MAX_ENTRIES = 16
+CACHE_TTL_SECONDS = 60 * 60
+
+# Uploaded sheets are read and parsed on these threads, several at once, while the settings are chosen
+PARSE_WORKERS = 4
+# How often the page checks whether a background parse has finished
+PARSE_POLL_SECONDS = 0.5
+
+
+@st.cache_resource
+def parse_executor():
+    """Worker threads shared by every session for parsing uploads in the background"""
+    return concurrent.futures.ThreadPoolExecutor(max_workers=PARSE_WORKERS, thread_name_prefix="rekap-parse")
+
+
+def upload_job(file_hash, file_bytes, sheet):
+    """This session's background parse of one sheet of an upload, started the first time it is seen"""
+    jobs = st.session_state.setdefault("parse_jobs", {})
+    if (file_hash, sheet) not in jobs:
+        jobs[(file_hash, sheet)] = ParseJob(parse_executor(), file_bytes, sheet)
+    return jobs[(file_hash, sheet)]
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def workbook_sheets(file_hash, _file_bytes):
+    """Worksheet names of an uploaded workbook, cached by the file's content hash"""
+    return sheet_names(io.BytesIO(_file_bytes))
+
+
+def upload_sources(uploaded_files):
+    """Every sheet of every uploaded workbook as (label, file hash, file bytes, sheet, store key), with its parse started.
+
+    A workbook with a single sheet is labelled by its file name alone, and
+    repeated file names get a number. The store key is the (file name,
+    sheet) pair the sheet is saved under, see :func:`rekap.store.period_id`.
+    Parses of sheets no longer uploaded are dropped; workbooks whose sheets
+    cannot be listed are returned as errors.
+    """
+    sources, errors, dipakai = [], {}, collections.Counter()
+    for uploaded in uploaded_files:
+        file_bytes = uploaded.getvalue()
+        file_hash = hashlib.sha256(file_bytes).hexdigest()
+        try:
+            sheets = workbook_sheets(file_hash, file_bytes)
+        except Exception as e:
+            errors[uploaded.name] = e
+            continue
+        name = uploaded.name
+        dipakai[name] += 1
+        if dipakai[name] > 1:
+            stem, ext = os.path.splitext(name)
+            name = f"{stem} ({dipakai[name]}){ext}"
+        for sheet in sheets:
+            store_key = (name, None) if len(sheets) == 1 else (name, sheet)
+            label = name if len(sheets) == 1 else f"{name} [{sheet}]"
+            sources.append((label, file_hash, file_bytes, sheet, store_key))
+            upload_job(file_hash, file_bytes, sheet)
+
+    jobs = st.session_state.setdefault("parse_jobs", {})
+    for key in set(jobs) - {(file_hash, sheet) for _, file_hash, _, sheet, _ in sources}:
+        del jobs[key]
+    return sources, errors
+
 # Role and time settings with modern sidebar configuration
 with st.sidebar:
     st.markdown("### ⚙️ Configuration Panel")
     
+    view_mode = st.radio(
+        "📊 View", ["Upload Analysis", "Multi-Month Report"], horizontal=True,
+        help="Multi-Month Report aggregates every upload saved to the punch store"
+    )
+    multi_month = view_mode == "Multi-Month Report"
+    
     # Role time configuration
     with st.expander("🕐 Work Schedule Settings", expanded=False):
-        role_settings = {
-            "SMPSMK": {"jam_masuk": "07:00", "jam_pulang": "15:00", "pulang_next_day": False},
-            "ASRAMA": {"jam_masuk": "15:00", "jam_pulang": "07:00", "pulang_next_day": True},
-            "MUSYRIF": {"jam_masuk": "15:00", "jam_pulang": "07:00", "pulang_next_day": True}
-        }
+        role_settings = {role: dict(jadwal) for role, jadwal in DEFAULT_ROLE_SETTINGS.items()}
+        jadwal_valid = True
         
         for role in role_settings:
             st.markdown(f"**{role} Schedule**")
@@ -106,6 +197,12 @@ with st.sidebar:
                     f"Check Out{suffix}", value=role_settings[role]["jam_pulang"], 
                     key=f"pulang_{role}", help=f"End time for {role}"
                 )
+            for field in ("jam_masuk", "jam_pulang"):
+                try:
+                    jam_ke_menit(role_settings[role][field])
+                except ValueError as e:
+                    st.error(f"⚠️ {role}: {e}")
+                    jadwal_valid = False
             st.divider()
     
     # Date range selection with modern styling
@@ -126,26 +223,27 @@ with st.sidebar:
     tahun = st.number_input("🗓️ Year", value=datetime.now().year, step=1, min_value=2020, max_value=2030)
     
     st.markdown("### 📂 File Upload")
-    uploaded_file = st.file_uploader(
-        "Upload attendance file (.xlsx)", 
+    uploaded_files = st.file_uploader(
+        "Upload attendance files (.xlsx)", 
         type=["xlsx"],
-        help="Upload your Excel attendance file for analysis"
+        accept_multiple_files=True,
+        help="Upload one or more Excel attendance files; every sheet of each file is analysed"
+    )
+    # Decoding and parsing of every sheet start now and run while the settings below are changed
+    sources, source_errors = upload_sources(uploaded_files)
+    incremental = st.toggle(
+        "♻️ Incremental Mode", value=False,
+        help="Remember this workbook's results and only process new or edited days when it is uploaded again"
+    )
+    save_to_store = st.toggle(
+        "🗄️ Save to Punch Store", value=True,
+        help="Keep the parsed punches of each upload as Parquet, for later recaps and cross-month reports"
     )
-
-def get_performance_badge(issues_count, total_days):
-    """Generate performance badge based on attendance issues"""
-    if total_days == 0:
-        return "status-warning", "No Data"
     
-    issue_rate = issues_count / total_days
-    if issue_rate == 0:
-        return "status-excellent", "Excellent"
-    elif issue_rate <= 0.1:
-        return "status-good", "Good"
-    elif issue_rate <= 0.3:
-        return "status-warning", "Needs Attention"
-    else:
-        return "status-danger", "Poor"
+    # Profiling options for slow uploads
+    with st.expander("⏱️ Profiling", expanded=False):
+        trace_memory = st.toggle("Trace memory per stage", value=False, help="Slower; bypasses the recap cache")
+        capture_cprofile = st.toggle("Capture cProfile", value=False, help="Profiles the whole run; bypasses the recap cache")
 
 def create_summary_metrics(df_hasil):
     """Create summary metrics for dashboard"""
@@ -187,230 +285,458 @@ def create_summary_metrics(df_hasil):
             delta_color="inverse"
         )
 
-def parse_jam(cell):
-    """Parse time entries from cell data"""
-    if pd.isna(cell): 
-        return []
-    
-    cell = str(cell).strip().lower()
+DETAIL_PAGE_SIZES = [10, 25, 50, 100]
+
+
+def reset_detail_page():
+    """Go back to the first page of the detailed view"""
+    st.session_state.detail_page = 1
+
+
+def jump_to_employee(names, page_size):
+    """Open the detailed-view page that holds the selected employee"""
+    target = st.session_state.detail_jump
+    if target in names:
+        st.session_state.detail_page = names.index(target) // page_size + 1
+
+
+def show_employee_detail(row, expanded=False):
+    """Expander card with one employee's issues and performance rating"""
+    # Performance color coding
+    if row['Performance'] == 'Excellent':
+        status_color = "#155724"
+        bg_color = "#d4edda"
+    elif row['Performance'] == 'Good':
+        status_color = "#0c5460"
+        bg_color = "#d1ecf1"
+    elif row['Performance'] == 'Needs Attention':
+        status_color = "#856404"
+        bg_color = "#fff3cd"
+    else:
+        status_color = "#721c24"
+        bg_color = "#f8d7da"
     
-    # If cell is empty after stripping
-    if not cell:
-        return []
+    with st.expander(f"👤 **{row['Nama']}** - {row['Role']} | Performance: {row['Performance']}", expanded=expanded):
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.markdown("**📊 Attendance Issues**")
+            st.metric("Absent Days", row['Tidak Absen'])
+            if row['Tanggal Tidak Absen']:
+                st.caption(f"📅 Dates: {row['Tanggal Tidak Absen']}")
+            
+            st.metric("Incomplete Records", row['Absen Tidak Lengkap'])
+            if row['Tanggal Absen Kurang']:
+                st.caption(f"📅 Dates: {row['Tanggal Absen Kurang']}")
+            
+            st.metric("Multiple Check-ins", row['Hari Absen >2x'])
+            if row['Tanggal Absen >2x']:
+                st.caption(f"📅 Dates: {row['Tanggal Absen >2x']}")
+        
+        with col2:
+            st.markdown("**⏰ Punctuality Issues**")
+            st.metric("Late Arrivals", row['Telat Masuk'])
+            if row['Tanggal Telat Masuk']:
+                st.caption(f"📅 Dates: {row['Tanggal Telat Masuk']}")
+            
+            st.metric("Early Departures", row['Pulang Cepat'])
+            if row['Tanggal Pulang Cepat']:
+                st.caption(f"📅 Dates: {row['Tanggal Pulang Cepat']}")
+            
+        with col3:
+            st.markdown("**🎯 Performance Summary**")
+            st.markdown(f"""
+            <div style="background-color: {bg_color}; color: {status_color}; padding: 1rem; border-radius: 8px; text-align: center; margin: 1rem 0;">
+                <h3 style="margin: 0; color: {status_color};">{row['Performance']}</h3>
+                <p style="margin: 0.5rem 0; color: {status_color};">Overall Rating</p>
+            </div>
+            """, unsafe_allow_html=True)
+            
+            total_issues = row['Tidak Absen'] + row['Absen Tidak Lengkap'] + row['Telat Masuk'] + row['Pulang Cepat']
+            st.metric("Total Issues", total_issues)
+
+# Above this many cells the summary table skips the Styler (row colours) and
+# uses Streamlit's native column rendering instead
+STYLER_MAX_CELLS = 20_000
+
+# The debug table shows at most this many incomplete records (a random sample above it)
+DEBUG_MAX_RECORDS = 2_000
+
+# Incremental mode keeps each workbook's per-day results here between uploads
+STATE_DIR = os.environ.get("REKAP_STATE_DIR", ".rekap_state")
+# Punch store (Parquet) that uploads are normalized into
+STORE_DIR = os.environ.get("REKAP_STORE_DIR", ".rekap_store")
+
+
+def progress_bar_reporter(text):
+    """Progress bar plus the ProgressReporter that redraws it, at most a few times per second"""
+    progress_bar = st.progress(0.0, text=text)
+    return progress_bar, ProgressReporter(
+        lambda update: progress_bar.progress(update.fraction, text=format_progress(update))
+    )
+
+
+def parsed_upload(file_hash, file_bytes, sheet):
+    """Raw frame, parsed cells and worker stage timings of an uploaded sheet, waiting for its background parse.
+
+    Timings of a parse that had already finished are marked cached: that work
+    happened during an earlier run.
+    """
+    job = upload_job(file_hash, file_bytes, sheet)
+    finished_before = job.done()
+    if not finished_before:
+        progress_bar = st.progress(0.0, text="Parsing workbook...")
+        while not job.done():
+            concurrent.futures.wait([job.future], timeout=PARSE_POLL_SECONDS)
+            if job.latest is not None:
+                progress_bar.progress(job.latest.fraction, text=format_progress(job.latest))
+        progress_bar.empty()
+    # A failed parse raises here on every run until the upload changes
+    df, cells = job.result()
+    return df, cells, [dict(record, cached=finished_before) for record in job.timer.records]
+
+
+def prepare_upload(file_hash, file_bytes, sheet, role_names, bulan_awal, bulan_akhir, tahun, timer, reparse=False):
+    """Classify an uploaded sheet up to the schedule thresholds, recording every stage on ``timer``.
+
+    The cells come from the upload's background parse; with ``reparse`` they
+    are parsed again here so measured runs time (and trace) that stage too.
+    """
+    df, cells, parse_records = parsed_upload(file_hash, file_bytes, sheet)
+    period = Period(bulan_map[bulan_awal], bulan_map[bulan_akhir], tahun)
+    if reparse:
+        timer.extend(record for record in parse_records if record["stage"] == "read")
+        progress_bar, progress = progress_bar_reporter("Parsing workbook...")
+        prepared = prepare_sheet(df, period, role_names, timer, progress)
+        progress_bar.empty()
+    else:
+        timer.extend(parse_records)
+        prepared = classify_parsed(cells, period, role_names, timer)
+    return prepared
+
+
+# A resource, not data: the prepared sheet (raw cells included) is handed out as is instead of unpickled on every hit
+@st.cache_resource(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def load_prepared(file_hash, _file_bytes, sheet, role_names, bulan_awal, bulan_akhir, tahun):
+    """Parsed upload, cached without the schedule times so changing them skips parsing; with its stage timer.
+
+    The same PreparedSheet is shared by every rerun and session, so callers
+    only read it (recap_prepared and the views derive new arrays from it).
+    """
+    timer = StageTimer()
+    prepared = prepare_upload(file_hash, _file_bytes, sheet, role_names, bulan_awal, bulan_akhir, tahun, timer)
+    return prepared, timer
+
+
+def recap_upload(file_hash, file_bytes, sheet, role_settings, bulan_awal, bulan_akhir, tahun, timer,
+                 state_path=None, reuse_parse=False):
+    """Read and recap an uploaded sheet, recording every stage on ``timer``.
+
+    With ``state_path`` the previous run's results for the same sheet are
+    reused and the new ones saved there. With ``reuse_parse`` the parsed sheet comes from :func:`load_prepared`, so only
+    the schedule thresholds are applied again when they change.
+    """
+    if state_path is None:
+        if reuse_parse:
+            prepared, parse_timer = load_prepared(
+                file_hash, file_bytes, sheet, tuple(role_settings), bulan_awal, bulan_akhir, tahun
+            )
+            if parse_timer.started_at < timer.started_at:
+                timer.extend(parse_timer.records, cached=True)
+            else:
+                timer.extend(parse_timer.records)
+        else:
+            prepared = prepare_upload(
+                file_hash, file_bytes, sheet, tuple(role_settings), bulan_awal, bulan_akhir, tahun, timer, reparse=True
+            )
+        df_hasil, day_sets = recap_prepared(prepared, role_settings, timer=timer, compact=True)
+        # Debug rows are only built when asked for (see load_debug_records)
+        debug_count = int(prepared.catat_debug.sum())
+    else:
+        df, _, parse_records = parsed_upload(file_hash, file_bytes, sheet)
+        # Only the read is reused; update_recap parses the rows that changed itself
+        timer.extend(record for record in parse_records if record["stage"] == "read")
+        progress_bar, progress = progress_bar_reporter("Updating recap...")
+        period = Period(bulan_map[bulan_awal], bulan_map[bulan_akhir], tahun)
+        (df_hasil, day_sets), state = update_recap(
+            df, role_settings, period, state=load_state(state_path), progress=progress, timer=timer, compact=True
+        )
+        progress_bar.empty()
+        debug_count = int(state.catat_debug.sum())
+        save_state(state, state_path)
+
+    # Row colours of the summary table, computed once per recap
+    with timer.stage("style map", rows=len(df_hasil)):
+        row_css = performance_css(df_hasil['Performance'])
+
+    return df_hasil, day_sets, debug_count, row_css
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def build_recap(file_hash, _file_bytes, sheet, role_settings, bulan_awal, bulan_akhir, tahun,
+                state_path=None):
+    """Compute the attendance recap and its row styles, cached by file hash and settings, with its stage timer"""
+    timer = StageTimer()
+    df_hasil, day_sets, debug_count, row_css = recap_upload(
+        file_hash, _file_bytes, sheet, role_settings, bulan_awal, bulan_akhir, tahun, timer, state_path, reuse_parse=True
+    )
+    return df_hasil, day_sets, debug_count, row_css, timer
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def sweep_upload(file_hash, _file_bytes, sheet, role_settings, bulan_awal, bulan_akhir, tahun, span, step):
+    """Late/early counts per role over a range of cutoffs, from the cached parse of an uploaded sheet"""
+    prepared, _ = load_prepared(file_hash, _file_bytes, sheet, tuple(role_settings), bulan_awal, bulan_akhir, tahun)
+    return threshold_sweep(prepared.shifts, prepared.roles, role_settings, span, step)
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def punch_distribution(file_hash, _file_bytes, sheet, role_names, bulan_awal, bulan_akhir, tahun):
+    """First/last punch histogram of an uploaded sheet, built once from its cached parse"""
+    prepared, _ = load_prepared(file_hash, _file_bytes, sheet, role_names, bulan_awal, bulan_akhir, tahun)
+    return punch_histogram(prepared.grid, prepared.roles, prepared.tanggal_final)
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def load_debug_records(file_hash, _file_bytes, sheet, role_names, bulan_awal, bulan_akhir, tahun,
+                       limit=DEBUG_MAX_RECORDS):
+    """Incomplete-attendance records of an uploaded sheet, derived from its cached parse and capped at ``limit``"""
+    prepared, _ = load_prepared(file_hash, _file_bytes, sheet, role_names, bulan_awal, bulan_akhir, tahun)
+    return pd.DataFrame(prepared_debug(prepared, limit))
+
+
+def quantile_table(hist, by):
+    """Punch-time quantiles of the histogram rows as HH:MM text"""
+    table = punch_quantiles(hist, by)
+    for kolom in [f"p{round(q * 100)}" for q in QUANTILES]:
+        table[kolom] = [menit_ke_jam(int(menit)) for menit in table[kolom]]
+    return table.rename(columns={"punch": "Punch", "count": "Days", "weekday": "Weekday"})
+
+
+def recap_csv(df_hasil, day_sets):
+    """Full recap report as CSV bytes, with the date lists and without the styling column"""
+    return add_dates(df_hasil, day_sets).drop(['Badge_Class'], axis=1).to_csv(index=False).encode("utf-8")
+
+
+def incremental_state_path(label):
+    """Where the incremental state of an uploaded sheet is kept, by its label"""
+    os.makedirs(STATE_DIR, exist_ok=True)
+    return os.path.join(STATE_DIR, f"{os.path.basename(label)}.state.pkl")
+
+
+def store_upload(file_hash, file_bytes, sheet, store_key, bulan_awal, bulan_akhir, tahun, timer, rows=None):
+    """Save an uploaded sheet's punches to the punch store, unless it was last saved with the same period.
+
+    Runs outside the caches, so whether the store is written never depends on
+    a cache hit. The session remembers the period saved for each upload hash;
+    saving again (e.g. in a new session) replaces the same entry, see
+    :func:`rekap.store.period_id`.
+    """
+    period = Period(bulan_map[bulan_awal], bulan_map[bulan_akhir], tahun)
+    # Period last saved for each upload; the store entry holds that one
+    tersimpan = st.session_state.setdefault("stored_uploads", {})
+    kunci = (file_hash, sheet, store_key)
+    if tersimpan.get(kunci) == period:
+        return
+    df, _, _ = parsed_upload(file_hash, file_bytes, sheet)
+    with timer.stage("store", rows=rows):
+        store_sheet(STORE_DIR, df, period, *store_key)
+    tersimpan[kunci] = period
+
+
+def recap_source(source, role_settings, bulan_awal, bulan_akhir, tahun, timer, measured, incremental, save_to_store):
+    """Recap of one uploaded sheet; its stages are added to ``timer`` tagged with the sheet's label.
+
+    ``measured`` runs skip the recap cache so every stage really executes.
+    With ``save_to_store`` the sheet is then saved by :func:`store_upload`.
+    """
+    label, file_hash, file_bytes, sheet, store_key = source
+    state_path = incremental_state_path(label) if incremental else None
+    sheet_timer = StageTimer(trace_memory=timer.trace_memory)
+    if measured:
+        result = recap_upload(
+            file_hash, file_bytes, sheet, role_settings, bulan_awal, bulan_akhir, tahun, sheet_timer, state_path
+        )
+    else:
+        with sheet_timer.stage("cache lookup") as lookup:
+            *result, recap_timer = build_recap(
+                file_hash, file_bytes, sheet, role_settings, bulan_awal, bulan_akhir, tahun, state_path
+            )
+        if recap_timer.started_at < sheet_timer.started_at:
+            sheet_timer.extend(recap_timer.records, cached=True)
+        else:
+            # A miss already ran (and timed) every stage; the lookup would count them twice
+            sheet_timer.records.remove(lookup)
+            sheet_timer.extend(recap_timer.records)
+    if save_to_store:
+        store_upload(file_hash, file_bytes, sheet, store_key, bulan_awal, bulan_akhir, tahun, sheet_timer, len(result[0]))
+    timer.extend(sheet_timer.records, source=label)
+    return tuple(result)
+
+
+def show_source_summary(sources, recaps, failed, timer):
+    """Employees, processing time and outcome of every uploaded sheet"""
+    rows = []
+    for label in [source[0] for source in sources] + [label for label in failed if label not in recaps]:
+        if label in recaps:
+            seconds = sum(
+                record["seconds"] for record in timer.records if record.get("source") == label and not record["cached"]
+            )
+            rows.append({"Source": label, "Employees": len(recaps[label][0]), "Seconds": round(seconds, 3), "Status": "✅ OK"})
+        elif label in failed:
+            rows.append({"Source": label, "Employees": 0, "Seconds": None, "Status": f"❌ {failed[label]}"})
+    with st.expander(f"📂 Sources ({len(recaps)} of {len(rows)} sheets analysed)", expanded=bool(failed)):
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+
+def show_multi_month_report(role_settings):
+    """Rolling and year-to-date totals per employee over the punch store"""
+    st.markdown("## 📈 **Multi-Month Report**")
+    index = latest_entries(read_index(STORE_DIR))
+    if index.empty:
+        st.info("📭 No stored uploads yet. Analyse workbooks with **🗄️ Save to Punch Store** enabled to build the history.")
+        return
     
-    # Check for holiday marker
-    if 'l' in cell: 
-        return ['L']
+    bulan_tersedia = pd.period_range(index['date_min'].min(), index['date_max'].max(), freq="M")[::-1]
+    col1, col2 = st.columns(2)
+    with col1:
+        window = st.selectbox("🪟 Window", list(REPORT_WINDOWS), index=2)
+    with col2:
+        bulan_akhir_laporan = st.selectbox("📅 Ending Month", bulan_tersedia, format_func=lambda p: p.strftime("%B %Y"))
     
-    # Split by newlines and filter only valid time entries
-    jam_entries = cell.replace('\n', '\n').split('\n')
-    valid_times = []
+    with st.spinner("🔄 Aggregating stored periods..."):
+        report = multi_month_report(STORE_DIR, role_settings, bulan_akhir_laporan.to_timestamp(), REPORT_WINDOWS[window])
+    start, end = report_window(bulan_akhir_laporan.to_timestamp(), REPORT_WINDOWS[window])
+    st.info(
+        f"👥 **{len(report)}** employees · {start:%B %Y} – {end:%B %Y} · "
+        f"{len(index)} stored sheets ({', '.join(index['source'].unique())})"
+    )
+    st.caption(
+        "Employees are matched by name and role across all stored sheets: one person's months from different "
+        "workbooks add up, and so do two people with the same name and role in different units' workbooks."
+    )
     
-    for entry in jam_entries:
-        entry = entry.strip()
-        
-        # Check for time format with colon (:) or dot (.)
-        if (':' in entry or '.' in entry):
-            # Replace dots with colons for standardization
-            normalized_entry = entry.replace('.', ':')
-            time_parts = normalized_entry.split(':')
-            
-            # Support HH:MM or HH:MM:SS format
-            if len(time_parts) >= 2:
-                try:
-                    hours = time_parts[0]
-                    minutes = time_parts[1]
-                    
-                    # Validate if hours and minutes are digits
-                    if hours.isdigit() and minutes.isdigit():
-                        hour_int = int(hours)
-                        minute_int = int(minutes)
-                        
-                        # Validate time range
-                        if 0 <= hour_int <= 23 and 0 <= minute_int <= 59:
-                            # Format to HH:MM (ignore seconds if present)
-                            formatted_time = f"{hour_int:02d}:{minute_int:02d}"
-                            valid_times.append(formatted_time)
-                except:
-                    continue
+    if report.size <= STYLER_MAX_CELLS:
+        st.dataframe(style_performance(report, performance_css(report['Performance'])), use_container_width=True, height=600)
+    else:
+        st.dataframe(report.assign(Performance=performance_labels(report['Performance'])), use_container_width=True, height=600)
     
-    return valid_times
-
-def valid_jam_smpsmk(jam_list):
-    """Extract valid check-in and check-out times for SMPSMK role"""
-    masuk = None
-    pulang = None
-    for jam in jam_list:
-        if jam >= "00:00" and masuk is None:
-            masuk = jam
-        pulang = jam  # Take the last time as check-out
-    return masuk, pulang
-
-if uploaded_file:
-    with st.spinner("🔄 Processing attendance data..."):
-        df = pd.read_excel(uploaded_file, header=None)
+    st.download_button(
+        "📥 Download Multi-Month Report (CSV)",
+        report.to_csv(index=False).encode("utf-8"),
+        f"attendance_report_{start:%Y-%m}_{end:%Y-%m}.csv",
+        "text/csv"
+    )
 
-        # Process date headers
-        tanggal_header = df.iloc[4, 2:].tolist()
-        tanggal_final = []
-        bulan_aktif = bulan_map[bulan_awal]
-        current_bulan = bulan_aktif
 
-        for i, val in enumerate(tanggal_header):
+@st.fragment(run_every=PARSE_POLL_SECONDS)
+def show_parse_status(sources):
+    """Progress of every uploaded sheet's background parse; reruns the whole page once all have finished"""
+    jobs = [upload_job(file_hash, file_bytes, sheet) for _, file_hash, file_bytes, sheet, _ in sources]
+    if all(job.done() for job in jobs):
+        st.rerun()
+    st.info("⏳ Parsing the upload in the background. Adjust the settings meanwhile; the recap appears when it is done.")
+    for (label, *_), job in zip(sources, jobs):
+        update = job.latest
+        if job.done():
+            st.progress(1.0, text=f"{label}: done")
+        else:
+            st.progress(
+                update.fraction if update is not None else 0.0,
+                text=f"{label}: " + (format_progress(update) if update is not None else "reading workbook...")
+            )
+
+
+def show_profile_panel(timer, profiler):
+    """Sidebar panel with the stage timings of this run, as a table and JSON"""
+    with st.sidebar, st.expander("⏱️ Performance Profile", expanded=False):
+        st.caption(f"Total wall time this run: **{timer.total_seconds():.3f}s**")
+        st.dataframe(pd.DataFrame(timer.records), use_container_width=True, hide_index=True)
+        if any(record["cached"] for record in timer.records):
+            st.caption("Stages marked *cached* were measured when the recap was first computed.")
+        st.download_button(
+            "📥 Download Timings (JSON)",
+            timer.to_json(),
+            "stage_timings.json",
+            "application/json"
+        )
+        if profiler is not None:
+            st.code(format_profile(profiler), language=None)
+
+if (uploaded_files or multi_month) and not jadwal_valid:
+    st.error("⚠️ Please fix the invalid times in **Work Schedule Settings** (use HH:MM, e.g. 07:00).")
+elif multi_month:
+    show_multi_month_report(role_settings)
+elif sources and not all(upload_job(file_hash, file_bytes, sheet).done() for _, file_hash, file_bytes, sheet, _ in sources):
+    show_parse_status(sources)
+elif uploaded_files:
+    timer = StageTimer(trace_memory=trace_memory)
+    profiler = cProfile.Profile() if capture_cprofile else None
+    if profiler is not None:
+        profiler.enable()
+    
+    with st.spinner("🔄 Processing attendance data..."):
+        # Every sheet is recapped on its own; one that fails is reported and left out of the merged table
+        recaps, debug_counts, failed = {}, {}, dict(source_errors)
+        for source in sources:
             try:
-                tgl = int(val)
-                if i > 0 and int(tanggal_header[i]) < int(tanggal_header[i-1]):
-                    current_bulan = bulan_map[bulan_akhir]
-                tanggal_final.append(datetime(tahun, current_bulan, tgl))
-            except:
-                tanggal_final.append(None)
-
-        nama_guru = df.iloc[5:, 0].dropna().tolist()
-        role_guru = df.iloc[5:, 1].tolist()
-        data_absensi = df.iloc[5:, 2:2+len(tanggal_final)].values.tolist()
-
-        hasil = []
-
-        # Process each employee
-        progress_bar = st.progress(0)
-        debug_info = []  # For debugging purposes
+                df_sheet, day_sets_sheet, debug_counts[source[0]], row_css = recap_source(
+                    source, role_settings, bulan_awal, bulan_akhir, tahun, timer,
+                    trace_memory or capture_cprofile, incremental, save_to_store
+                )
+            except Exception as e:
+                failed[source[0]] = e
+                continue
+            recaps[source[0]] = (df_sheet, day_sets_sheet)
+        sources = [source for source in sources if source[0] in recaps]
         
-        for idx, (nama, role, baris_absen) in enumerate(zip(nama_guru, role_guru, data_absensi)):
-            progress_bar.progress((idx + 1) / len(nama_guru))
-            
-            role = role.strip().upper() if isinstance(role, str) else "SMPSMK"
-            
-            # Set default role if not in predefined roles
-            if role not in role_settings:
-                role = "SMPSMK"
-                
-            tdk_absen, absen_kurang, absen_bermasalah = [], [], []
-            telat_masuk, pulang_cepat = [], []
-
-            for i, (tgl, isi) in enumerate(zip(tanggal_final, baris_absen)):
-                if not tgl:
-                    continue
-                jam_list = parse_jam(isi)
-                if 'L' in jam_list:
-                    continue
-
-                if role == "SMPSMK":
-                    # Debug info for SMPSMK incomplete records
-                    if len(jam_list) == 1:
-                        debug_info.append({
-                            'nama': nama,
-                            'role': role,
-                            'tanggal': tgl.strftime("%d-%b"),
-                            'isi_cell': str(isi),
-                            'jam_parsed': jam_list,
-                            'total_entries': len(jam_list),
-                            'kategori': 'Absen Tidak Lengkap'
-                        })
-                    
-                    if len(jam_list) == 0:
-                        tdk_absen.append(tgl)
-                    elif len(jam_list) == 1:
-                        # Hanya 1 waktu absen = absen tidak lengkap
-                        absen_kurang.append(tgl)
-                    else:
-                        masuk, pulang = valid_jam_smpsmk(jam_list)
-                        jam_masuk_batas = role_settings[role]["jam_masuk"]
-                        jam_pulang_batas = role_settings[role]["jam_pulang"]
-                        
-                        if not masuk or not pulang:
-                            absen_kurang.append(tgl)
-                        else:
-                            if masuk > jam_masuk_batas:
-                                telat_masuk.append(tgl)
-                            if pulang < jam_pulang_batas:
-                                pulang_cepat.append(tgl)
-                        if len(jam_list) > 2:
-                            absen_bermasalah.append(tgl)
-
-                elif role == "ASRAMA" or role == "MUSYRIF":
-                    jam_besok = parse_jam(data_absensi[idx][i+1]) if i+1 < len(baris_absen) and i+1 < len(data_absensi[idx]) else []
-                    jam_hari_ini = parse_jam(isi)
-                    
-                    # Skip if holiday markers found
-                    if 'L' in jam_hari_ini or 'L' in jam_besok:
-                        continue
-                    
-                    # Debug info for ASRAMA/MUSYRIF incomplete records
-                    total_entries = len(jam_hari_ini) + len(jam_besok)
-                    if total_entries == 1:
-                        debug_info.append({
-                            'nama': nama,
-                            'role': role,
-                            'tanggal': tgl.strftime("%d-%b"),
-                            'isi_hari_ini': str(isi),
-                            'isi_besok': str(data_absensi[idx][i+1]) if i+1 < len(data_absensi[idx]) else "N/A",
-                            'jam_hari_ini': jam_hari_ini,
-                            'jam_besok': jam_besok,
-                            'total_entries': total_entries,
-                            'kategori': 'Absen Tidak Lengkap'
-                        })
-
-                    # Check for incomplete attendance first
-                    if total_entries == 0:
-                        tdk_absen.append(tgl)
-                    elif total_entries == 1:
-                        # Hanya 1 waktu absen = absen tidak lengkap
-                        absen_kurang.append(tgl)
-                    else:
-                        masuk = next((jam for jam in reversed(jam_hari_ini) if jam >= "00:00"), None)
-                        pulang = next((jam for jam in jam_besok if jam >= "00:00"), None)
-
-                        jam_masuk_batas = role_settings[role]["jam_masuk"]
-                        jam_pulang_batas = role_settings[role]["jam_pulang"]
-
-                        if not masuk or not pulang:
-                            absen_kurang.append(tgl)
-                        else:
-                            if masuk > jam_masuk_batas:
-                                telat_masuk.append(tgl)
-                            if pulang < jam_pulang_batas:
-                                pulang_cepat.append(tgl)
-                    
-                    # Allow 2 entries per day (instead of 2 total across both days)
-                    if len(jam_hari_ini) > 2 or len(jam_besok) > 2:
-                        absen_bermasalah.append(tgl)
-
-            # Calculate total working days for performance metric
-            total_working_days = len([d for d in tanggal_final if d is not None])
-            total_issues = len(tdk_absen) + len(absen_kurang) + len(telat_masuk) + len(pulang_cepat)
-            badge_class, badge_text = get_performance_badge(total_issues, total_working_days)
-
-            hasil.append({
-                "Nama": nama,
-                "Role": role,
-                "Performance": badge_text,
-                "Badge_Class": badge_class,
-                "Tidak Absen": len(tdk_absen),
-                "Tanggal Tidak Absen": ", ".join([d.strftime("%d-%b") for d in tdk_absen]),
-                "Absen Tidak Lengkap": len(absen_kurang),
-                "Tanggal Absen Kurang": ", ".join([d.strftime("%d-%b") for d in absen_kurang]),
-                "Hari Absen >2x": len(absen_bermasalah),
-                "Tanggal Absen >2x": ", ".join([d.strftime("%d-%b") for d in absen_bermasalah]),
-                "Telat Masuk": len(telat_masuk),
-                "Tanggal Telat Masuk": ", ".join([d.strftime("%d-%b") for d in telat_masuk]),
-                "Pulang Cepat": len(pulang_cepat),
-                "Tanggal Pulang Cepat": ", ".join([d.strftime("%d-%b") for d in pulang_cepat])
-            })
-
-        progress_bar.empty()
-        df_hasil = pd.DataFrame(hasil)
+        if len(recaps) + len(failed) > 1:
+            show_source_summary(sources, recaps, failed, timer)
+        for label, e in failed.items():
+            st.warning(f"⚠️ **{label}** was skipped: {e}")
+        if not recaps:
+            if profiler is not None:
+                profiler.disable()
+            st.error("❌ None of the uploaded sheets could be analysed.")
+            st.stop()
         
-        # Debug information for troubleshooting
-        if debug_info:
-            with st.expander("🐛 Debug Info - Incomplete Attendance Records", expanded=False):
+        if len(recaps) == 1:
+            df_hasil, day_sets = recaps[sources[0][0]]
+        else:
+            with timer.stage("merge") as stage:
+                df_hasil, day_sets = merge_recaps(recaps)
+                row_css = performance_css(df_hasil['Performance'])
+                stage["rows"] = len(df_hasil)
+        debug_count = sum(debug_counts[label] for label in recaps)
+        
+        # Debug information for troubleshooting, built only when requested
+        if debug_count:
+            with st.expander(f"🐛 Debug Info - Incomplete Attendance Records ({debug_count:,})", expanded=False):
                 st.markdown("**Data yang dikategorikan sebagai 'Absen Tidak Lengkap' untuk semua role:**")
-                debug_df = pd.DataFrame(debug_info)
-                
-                # Group by role for better organization
-                for role in sorted(debug_df['role'].unique()):
-                    role_data = debug_df[debug_df['role'] == role]
-                    st.markdown(f"#### **{role} Role** ({len(role_data)} records)")
-                    st.dataframe(role_data, use_container_width=True)
+                load_debug = st.toggle(
+                    "Load records", value=False, key="debug_load",
+                    help=f"Built on demand from the parsed sheet; above {DEBUG_MAX_RECORDS:,} records a random sample is shown"
+                )
+                if load_debug:
+                    with timer.stage("debug table") as stage:
+                        debug_parts = []
+                        for label, file_hash, file_bytes, sheet, _ in sources:
+                            # Above the cap every sheet gets its share of the sample
+                            limit = max(1, DEBUG_MAX_RECORDS * debug_counts[label] // debug_count)
+                            part = load_debug_records(
+                                file_hash, file_bytes, sheet, tuple(role_settings), bulan_awal, bulan_akhir, tahun, limit
+                            )
+                            debug_parts.append(part.assign(sumber=label) if len(recaps) > 1 else part)
+                        debug_df = pd.concat(debug_parts, ignore_index=True)
+                        stage["rows"] = len(debug_df)
+                        if len(debug_df) < debug_count:
+                            st.caption(f"Showing a random sample of {len(debug_df):,} of {debug_count:,} records.")
+                        
+                        # Group by role for better organization
+                        for role in sorted(debug_df['role'].unique()):
+                            role_data = debug_df[debug_df['role'] == role]
+                            st.markdown(f"#### **{role} Role** ({len(role_data)} records)")
+                            st.dataframe(role_data, use_container_width=True)
         
         # Success message with modern styling
         st.success("✅ **Analysis Complete!** Your attendance data has been processed successfully.")
@@ -425,7 +751,9 @@ if uploaded_file:
         st.markdown("## 📋 **Detailed Results**")
         
         # View selection tabs
-        tab1, tab2 = st.tabs(["📊 **Summary Table**", "🔍 **Detailed View**"])
+        tab1, tab2, tab3, tab4 = st.tabs([
+            "📊 **Summary Table**", "🔍 **Detailed View**", "🎯 **What-If Cutoffs**", "⏱️ **Punch Times**"
+        ])
         
         with tab1:
             st.markdown("### 📋 **Complete Attendance Summary**")
@@ -459,8 +787,8 @@ if uploaded_file:
                 show_details = st.toggle("📅 Show Date Details", value=True)
             
             if show_details:
-                # Create display dataframe with all details
-                display_df = filtered_df[[
+                # Create display dataframe with all details; date lists are rendered for these rows only
+                display_df = add_dates(filtered_df, day_sets)[[
                     'Nama', 'Role', 'Performance',
                     'Tidak Absen', 'Tanggal Tidak Absen',
                     'Absen Tidak Lengkap', 'Tanggal Absen Kurang',
@@ -492,23 +820,22 @@ if uploaded_file:
                     'Absent Days', 'Incomplete Records', 'Multiple Check-ins',
                     'Late Arrivals', 'Early Departures'
                 ]
-            
-            # Style the dataframe based on performance
-            def highlight_performance(row):
-                if row['Performance'] == 'Excellent':
-                    return ['background-color: #d4edda'] * len(row)
-                elif row['Performance'] == 'Good':
-                    return ['background-color: #d1ecf1'] * len(row)
-                elif row['Performance'] == 'Needs Attention':
-                    return ['background-color: #fff3cd'] * len(row)
-                elif row['Performance'] == 'Poor':
-                    return ['background-color: #f8d7da'] * len(row)
-                else:
-                    return [''] * len(row)
+            if 'Sumber' in filtered_df:
+                display_df.insert(1, 'Source', filtered_df['Sumber'])
             
             # Display the styled dataframe
-            styled_df = display_df.style.apply(highlight_performance, axis=1)
-            st.dataframe(styled_df, use_container_width=True, height=600)
+            with timer.stage("summary table", rows=len(display_df)):
+                if display_df.size <= STYLER_MAX_CELLS:
+                    st.dataframe(style_performance(display_df, row_css), use_container_width=True, height=600)
+                else:
+                    # Too large for the Styler: plain columns, with the legend icon marking each band
+                    st.dataframe(
+                        display_df.assign(Performance=performance_labels(display_df['Performance'])),
+                        use_container_width=True, height=600,
+                        column_config={"Performance": st.column_config.TextColumn(
+                            "Performance", help="🟢 Excellent · 🔵 Good · 🟡 Needs Attention · 🔴 Poor"
+                        )}
+                    )
             
             # Add legend
             st.markdown("""
@@ -539,105 +866,177 @@ if uploaded_file:
                     key="performance_filter_detail"
                 )
             
-            # Apply filters for detailed view
-            filtered_df_detail = df_hasil[
-                (df_hasil['Role'].isin(role_filter_detail)) & 
-                (df_hasil['Performance'].isin(performance_filter_detail))
-            ]
+            # Search and paging controls
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                search_detail = st.text_input("🔎 Search by Name", key="search_detail", placeholder="Type part of a name")
+            with col2:
+                page_size = st.selectbox(
+                    "Per Page", DETAIL_PAGE_SIZES, index=1, key="detail_page_size", on_change=reset_detail_page
+                )
             
-            # Show results count
-            st.info(f"👥 Showing **{len(filtered_df_detail)}** of **{len(df_hasil)}** employees")
+            # Apply filters for detailed view
+            mask_detail = (df_hasil['Role'].isin(role_filter_detail)) & (df_hasil['Performance'].isin(performance_filter_detail))
+            if search_detail.strip():
+                mask_detail &= df_hasil['Nama'].astype(str).str.contains(search_detail.strip(), case=False, regex=False)
+            filtered_df_detail = df_hasil[mask_detail]
             
             # Sort by performance severity (Poor first)
             performance_order = {'Poor': 0, 'Needs Attention': 1, 'Good': 2, 'Excellent': 3}
-            filtered_df_detail['Performance_Order'] = filtered_df_detail['Performance'].map(performance_order)
-            filtered_df_detail = filtered_df_detail.sort_values(['Performance_Order', 'Nama'])
+            filtered_df_detail = filtered_df_detail.assign(
+                Performance_Order=filtered_df_detail['Performance'].map(performance_order)
+            ).sort_values(['Performance_Order', 'Nama'])
+            
+            # Only the current page is rendered, so the cost no longer grows with headcount
+            nama_detail = filtered_df_detail['Nama'].astype(str).tolist()
+            total_pages = max(1, -(-len(nama_detail) // page_size))
+            if st.session_state.get("detail_page", 1) > total_pages:
+                st.session_state.detail_page = total_pages
+            
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                jump_target = st.selectbox(
+                    "🎯 Jump to Employee", nama_detail, index=None, key="detail_jump",
+                    placeholder="Select an employee", on_change=jump_to_employee, args=(nama_detail, page_size)
+                )
+            with col2:
+                page = st.number_input("Page", min_value=1, max_value=total_pages, step=1, key="detail_page")
+            
+            start = (page - 1) * page_size
+            page_df = add_dates(filtered_df_detail.iloc[start:start + page_size], day_sets)
+            
+            # Show results count
+            if len(page_df):
+                st.info(
+                    f"👥 Showing **{start + 1}-{start + len(page_df)}** of **{len(filtered_df_detail)}** "
+                    f"matching employees ({len(df_hasil)} total) · page {page} of {total_pages}"
+                )
+            else:
+                st.info(f"👥 Showing **0** of **{len(df_hasil)}** employees")
             
             # Display results with enhanced styling
-            for _, row in filtered_df_detail.iterrows():
-                # Performance color coding
-                if row['Performance'] == 'Excellent':
-                    status_color = "#155724"
-                    bg_color = "#d4edda"
-                elif row['Performance'] == 'Good':
-                    status_color = "#0c5460"
-                    bg_color = "#d1ecf1"
-                elif row['Performance'] == 'Needs Attention':
-                    status_color = "#856404"
-                    bg_color = "#fff3cd"
+            with timer.stage("detailed view", rows=len(page_df)):
+                for _, row in page_df.iterrows():
+                    show_employee_detail(row, expanded=str(row['Nama']) == jump_target)
+        
+        with tab3:
+            st.markdown("### 🎯 **What-If: Late and Early Counts by Cutoff**")
+            col1, col2 = st.columns(2)
+            with col1:
+                sweep_span = st.select_slider("± Minutes Around Schedule", [15, 30, 60, 90, 120], value=30, key="sweep_span")
+            with col2:
+                sweep_step = st.select_slider("Step (minutes)", [1, 5, 10, 15], value=5, key="sweep_step")
+            
+            with timer.stage("what-if") as stage:
+                sweep = merge_sweeps([
+                    sweep_upload(
+                        file_hash, file_bytes, sheet, role_settings, bulan_awal, bulan_akhir, tahun, sweep_span, sweep_step
+                    )
+                    for label, file_hash, file_bytes, sheet, _ in sources
+                ])
+                stage["rows"] = len(sweep)
+            
+            col1, col2 = st.columns(2)
+            for col, issue, title in ((col1, "Telat Masuk", "⏰ Late Check-ins"), (col2, "Pulang Cepat", "🏃‍♂️ Early Departures")):
+                curve = sweep[sweep['Issue'] == issue]
+                fig = px.line(
+                    curve, x="Cutoff", y="Count", color="Role", markers=True, title=title,
+                    category_orders={"Cutoff": sorted(curve['Cutoff'].unique())}
+                )
+                with col:
+                    st.plotly_chart(fig, use_container_width=True)
+            st.caption("Counts use the current schedule of every other role; ★ marks each role's configured cutoff.")
+            
+            st.dataframe(
+                sweep.assign(Current=sweep['Current'].map({True: "★", False: ""})).drop(columns="Minutes"),
+                use_container_width=True, hide_index=True, height=400
+            )
+            st.download_button(
+                "📥 Download What-If Table (CSV)",
+                sweep.drop(columns="Minutes").to_csv(index=False).encode("utf-8"),
+                f"attendance_whatif_{bulan_awal}_{bulan_akhir}_{tahun}.csv",
+                "text/csv"
+            )
+        
+        with tab4:
+            st.markdown("### ⏱️ **Punch Time Distribution**")
+            with timer.stage("punch times") as stage:
+                # Employee numbers follow the rows of the merged recap
+                hist = merge_histograms(
+                    [
+                        punch_distribution(
+                            file_hash, file_bytes, sheet, tuple(role_settings), bulan_awal, bulan_akhir, tahun
+                        )
+                        for label, file_hash, file_bytes, sheet, _ in sources
+                    ],
+                    [len(recaps[label][0]) for label, *_ in sources]
+                )
+                stage["rows"] = len(hist)
+            
+            col1, col2, col3 = st.columns([1, 2, 2])
+            with col1:
+                scope = st.radio("Scope", ["Role", "Employee"], horizontal=True, key="dist_scope")
+            with col2:
+                if scope == "Role":
+                    dist_role = st.selectbox("👥 Role", sorted(hist['role'].unique()), key="dist_role")
+                    subset = hist[hist['role'] == dist_role]
                 else:
-                    status_color = "#721c24"
-                    bg_color = "#f8d7da"
+                    dist_employee = st.selectbox(
+                        "👤 Employee", range(len(df_hasil)), key="dist_employee",
+                        format_func=lambda i: f"{df_hasil['Nama'].iat[i]} ({df_hasil['Role'].iat[i]})"
+                    )
+                    subset = hist[hist['employee'] == dist_employee]
+            with col3:
+                dist_days = st.multiselect("📅 Weekdays", range(7), default=list(range(7)), format_func=WEEKDAYS.__getitem__, key="dist_days")
+            subset = subset[subset['weekday'].isin(dist_days)]
+            
+            if subset.empty:
+                st.info("📭 No punches recorded for this selection.")
+            else:
+                # Quarter-hour bars of first (arrival) and last (departure) punches
+                bars = subset.assign(Jam=subset['menit'] // 15 * 15).groupby(['punch', 'Jam'], observed=True)['count'].sum().reset_index()
+                bars['Time'] = [menit_ke_jam(int(menit)) for menit in bars['Jam']]
+                fig = px.bar(
+                    bars, x="Time", y="count", color="punch", barmode="group",
+                    category_orders={"Time": [menit_ke_jam(menit) for menit in range(0, 24 * 60, 15)]},
+                    labels={"count": "Days", "punch": "Punch"}
+                )
+                st.plotly_chart(fig, use_container_width=True)
                 
-                with st.expander(f"👤 **{row['Nama']}** - {row['Role']} | Performance: {row['Performance']}", expanded=False):
-                    col1, col2, col3 = st.columns(3)
-                    
-                    with col1:
-                        st.markdown("**📊 Attendance Issues**")
-                        st.metric("Absent Days", row['Tidak Absen'])
-                        if row['Tanggal Tidak Absen']:
-                            st.caption(f"📅 Dates: {row['Tanggal Tidak Absen']}")
-                        
-                        st.metric("Incomplete Records", row['Absen Tidak Lengkap'])
-                        if row['Tanggal Absen Kurang']:
-                            st.caption(f"📅 Dates: {row['Tanggal Absen Kurang']}")
-                        
-                        st.metric("Multiple Check-ins", row['Hari Absen >2x'])
-                        if row['Tanggal Absen >2x']:
-                            st.caption(f"📅 Dates: {row['Tanggal Absen >2x']}")
-                    
-                    with col2:
-                        st.markdown("**⏰ Punctuality Issues**")
-                        st.metric("Late Arrivals", row['Telat Masuk'])
-                        if row['Tanggal Telat Masuk']:
-                            st.caption(f"📅 Dates: {row['Tanggal Telat Masuk']}")
-                        
-                        st.metric("Early Departures", row['Pulang Cepat'])
-                        if row['Tanggal Pulang Cepat']:
-                            st.caption(f"📅 Dates: {row['Tanggal Pulang Cepat']}")
-                        
-                    with col3:
-                        st.markdown("**🎯 Performance Summary**")
-                        st.markdown(f"""
-                        <div style="background-color: {bg_color}; color: {status_color}; padding: 1rem; border-radius: 8px; text-align: center; margin: 1rem 0;">
-                            <h3 style="margin: 0; color: {status_color};">{row['Performance']}</h3>
-                            <p style="margin: 0.5rem 0; color: {status_color};">Overall Rating</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                        
-                        total_issues = row['Tidak Absen'] + row['Absen Tidak Lengkap'] + row['Telat Masuk'] + row['Pulang Cepat']
-                        st.metric("Total Issues", total_issues)
+                st.markdown("**📐 Percentiles**")
+                st.dataframe(quantile_table(subset, []), use_container_width=True, hide_index=True)
+                by_day = quantile_table(subset, ["weekday"])
+                by_day['Weekday'] = by_day['Weekday'].map(WEEKDAYS.__getitem__)
+                st.dataframe(by_day, use_container_width=True, hide_index=True)
         
         # Download section with modern styling
         st.markdown("---")
         st.markdown("## 💾 **Export Results**")
         
-        # Prepare clean DataFrame for export (remove styling columns)
-        export_df = df_hasil.drop(['Badge_Class'], axis=1)
-        csv = export_df.to_csv(index=False).encode("utf-8")
-        
-        col1, col2 = st.columns(2)
+        col1, col2, col3 = st.columns(3)
         with col1:
+            # The full CSV (with every date list) is only rendered when the button is clicked
             st.download_button(
                 "📥 Download Full Report (CSV)",
-                csv,
+                lambda: recap_csv(df_hasil, day_sets),
                 f"attendance_report_{bulan_awal}_{bulan_akhir}_{tahun}.csv",
                 "text/csv",
                 help="Download complete attendance analysis report"
             )
         
         with col2:
+            # Recap and summary sheets with the performance colours, also built only on click
+            st.download_button(
+                "📗 Download Excel Report (.xlsx)",
+                lambda: report_xlsx(df_hasil, day_sets),
+                f"attendance_report_{bulan_awal}_{bulan_akhir}_{tahun}.xlsx",
+                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                help="Recap and summary sheets, rows coloured by performance band"
+            )
+        
+        with col3:
             # Create summary CSV
-            summary_data = {
-                'Metric': ['Total Employees', 'Total Absences', 'Total Late Arrivals', 'Total Early Departures'],
-                'Value': [
-                    len(df_hasil),
-                    df_hasil['Tidak Absen'].sum(),
-                    df_hasil['Telat Masuk'].sum(),
-                    df_hasil['Pulang Cepat'].sum()
-                ]
-            }
-            summary_csv = pd.DataFrame(summary_data).to_csv(index=False).encode("utf-8")
+            summary_csv = summary_metrics(df_hasil).to_csv(index=False).encode("utf-8")
             st.download_button(
                 "📊 Download Summary (CSV)",
                 summary_csv,
@@ -645,6 +1044,11 @@ if uploaded_file:
                 "text/csv",
                 help="Download summary statistics only"
             )
+    
+    if profiler is not None:
+        profiler.disable()
+    timer.close()
+    show_profile_panel(timer, profiler)
             
 else:
     # Welcome message with instructions
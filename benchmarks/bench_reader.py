@@ -0,0 +1,58 @@
+"""Time and peak memory of each Excel reader backend on growing workbooks.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_reader --sizes 100 400 1600 --days 62
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.synthetic import write_workbook
+from rekap.reader import available_readers, read_workbook
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _measure(path, engine):
+    """Read once in a fresh process; report seconds and peak RSS growth"""
+    import pandas  # noqa: F401  (import cost is not part of the measurement)
+
+    before = _peak_rss_mb()
+    start = time.perf_counter()
+    frame = read_workbook(path, engine=engine)
+    elapsed = time.perf_counter() - start
+    return elapsed, _peak_rss_mb() - before, frame.shape
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 400, 1600], help="employee counts")
+    parser.add_argument("--days", type=int, default=62)
+    parser.add_argument("--readers", nargs="+", default=available_readers())
+    args = parser.parse_args(argv)
+
+    context = multiprocessing.get_context("spawn")
+    print(f"{'employees':>9} {'file MB':>8} {'reader':>18} {'seconds':>8} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = write_workbook(os.path.join(tmp, f"absensi_{size}.xlsx"), size, args.days, seed=size)
+            file_mb = os.path.getsize(path) / (1024 * 1024)
+            for engine in args.readers:
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    elapsed, peak_mb, _ = pool.submit(_measure, path, engine).result()
+                print(f"{size:>9} {file_mb:>8.2f} {engine:>18} {elapsed:>8.3f} {peak_mb:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Per-stage timing, throughput and peak memory of the recap pipeline.
+
+Generates synthetic workbooks for every combination of employee and day
+counts, then times each stage the app runs: Excel read, date-header parsing,
+cell parsing, classification, DataFrame build, styling and CSV export. Run
+from the repository root::
+
+    python -m benchmarks.bench_stages --employees 100 400 1600 --days 31 62
+    python -m benchmarks.bench_stages --role-mix SMPSMK=1 --extra-punches 1 --json out.json
+    python -m benchmarks.bench_stages --employees 4000 --days 62 --baseline
+
+With ``--baseline`` the cells stage is also timed the way the early app
+versions parsed, :func:`rekap.parsing.parse_jam` on one cell at a time, and
+the speedup of :func:`rekap.parsing.parse_grid` over it is printed.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.synthetic import DEFAULT_ROLE_MIX, parse_role_mix, write_workbook
+from rekap.engine import add_dates, classify_attendance, recap_table, sheet_dates, sheet_employees
+from rekap.parsing import NO_PUNCH, PunchGrid, parse_grid, parse_jam
+from rekap.performance import performance_css, style_performance
+from rekap.reader import READERS, read_workbook
+from rekap.settings import DEFAULT_ROLE_SETTINGS, Period, normalize_role
+
+PERIOD = Period(6, 7, 2025)
+
+
+def parse_per_cell(block):
+    """Baseline of the cells stage: :func:`parse_jam` on every cell, one at a time"""
+    block = np.asarray(block, dtype=object)
+    grid = PunchGrid(
+        np.zeros(block.shape, dtype=bool), np.zeros(block.shape, dtype=np.int16),
+        np.full(block.shape, NO_PUNCH, dtype=np.int16), np.full(block.shape, NO_PUNCH, dtype=np.int16)
+    )
+    for posisi, cell in np.ndenumerate(block):
+        jam_list = parse_jam(cell)
+        if jam_list == ['L']:
+            grid.holiday[posisi] = True
+        elif jam_list:
+            menit = [int(jam[:2]) * 60 + int(jam[3:]) for jam in jam_list]
+            grid.count[posisi], grid.first[posisi], grid.last[posisi] = len(menit), menit[0], menit[-1]
+    return grid
+
+
+def run_pipeline(path, reader, measure, baseline=False):
+    """Run every stage once; ``measure(name, fn)`` runs a stage and returns its result"""
+    frame = measure("read", lambda: read_workbook(path, engine=reader))
+    tanggal_final = measure("header", lambda: sheet_dates(frame, PERIOD))
+
+    def parse():
+        nama_guru, role_guru, data_absensi = sheet_employees(frame, len(tanggal_final))
+        return nama_guru, role_guru, parse_grid(data_absensi)
+    nama_guru, role_guru, grid = measure("cells", parse)
+    if baseline:
+        def parse_baseline():
+            nama_guru, role_guru, data_absensi = sheet_employees(frame, len(tanggal_final))
+            return parse_per_cell(data_absensi)
+        measure("per-cell", parse_baseline)
+
+    def classify():
+        roles = [normalize_role(role, DEFAULT_ROLE_SETTINGS) for role in role_guru]
+        hari_kerja = np.array([tgl is not None for tgl in tanggal_final], dtype=bool)
+        return roles, classify_attendance(grid, roles, hari_kerja, DEFAULT_ROLE_SETTINGS)[0]
+    roles, masks = measure("classify", classify)
+
+    df_hasil, day_sets = measure("build", lambda: recap_table(nama_guru, roles, masks, tanggal_final))
+    measure("dates", lambda: add_dates(df_hasil, day_sets))
+    measure("style", lambda: style_performance(df_hasil, performance_css(df_hasil["Performance"])).to_html())
+    measure("csv", lambda: add_dates(df_hasil, day_sets).drop(['Badge_Class'], axis=1).to_csv(index=False))
+
+
+def time_stages(path, reader, repeat, baseline=False):
+    """Best-of-``repeat`` seconds per stage"""
+    best = {}
+    for _ in range(repeat):
+        def measure(name, fn):
+            start = time.perf_counter()
+            result = fn()
+            elapsed = time.perf_counter() - start
+            best[name] = min(best.get(name, elapsed), elapsed)
+            return result
+        run_pipeline(path, reader, measure, baseline)
+    return best
+
+
+def peak_memory(path, reader, baseline=False):
+    """Peak traced allocation (MB) per stage, from a separate run under tracemalloc"""
+    peaks = {}
+
+    def measure(name, fn):
+        tracemalloc.start()
+        try:
+            return fn()
+        finally:
+            peaks[name] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            tracemalloc.stop()
+    run_pipeline(path, reader, measure, baseline)
+    return peaks
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--employees", type=int, nargs="+", default=[100, 400, 1600])
+    parser.add_argument("--days", type=int, nargs="+", default=[62])
+    parser.add_argument("--extra-punches", type=float, default=0.05, help="mean punches per cell beyond two")
+    parser.add_argument("--role-mix", type=parse_role_mix, default=DEFAULT_ROLE_MIX, metavar="ROLE=W,...")
+    parser.add_argument("--reader", choices=["auto", *READERS], default="auto")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", action="store_true", help="also time per-cell parse_jam parsing (slow)")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'employees':>9} {'days':>5} {'stage':>9} {'seconds':>8} {'cells/s':>11} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_employees, n_days in itertools.product(args.employees, args.days):
+            path = write_workbook(
+                os.path.join(tmp, f"absensi_{n_employees}x{n_days}.xlsx"), n_employees, n_days,
+                seed=n_employees * n_days, role_mix=args.role_mix, extra_punches=args.extra_punches
+            )
+            seconds = time_stages(path, args.reader, args.repeat, args.baseline)
+            peaks = peak_memory(path, args.reader, args.baseline)
+            cells = n_employees * n_days
+
+            for stage, elapsed in seconds.items():
+                throughput = cells / elapsed if elapsed else float("inf")
+                print(f"{n_employees:>9} {n_days:>5} {stage:>9} {elapsed:>8.4f} {throughput:>11,.0f} {peaks[stage]:>8.1f}")
+                results.append({
+                    "employees": n_employees, "days": n_days, "stage": stage,
+                    "seconds": elapsed, "cells_per_second": throughput, "peak_mb": peaks[stage],
+                })
+            baseline = seconds.pop("per-cell", None)
+            total = sum(seconds.values())
+            if baseline is not None:
+                print(f"{n_employees:>9} {n_days:>5} {'cells':>9} {baseline / seconds['cells']:>7.1f}x faster than per-cell parse_jam")
+            print(f"{n_employees:>9} {n_days:>5} {'total':>9} {total:>8.4f} {cells / total:>11,.0f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Synthetic attendance workbooks in the layout the app expects.
+
+Row 1 holds a title, rows 2-4 are blank, row 5 is the date header (day numbers
+that roll over into the next month), and every following row is one employee:
+name in column A, role in column B and one punch cell per day. Punch cells hold
+newline-separated times, sometimes with '.' separators or seconds, and 'L' on
+holidays.
+"""
+
+import random
+
+from openpyxl import Workbook
+
+DEFAULT_ROLE_MIX = {"SMPSMK": 0.6, "ASRAMA": 0.2, "MUSYRIF": 0.2}
+
+
+def parse_role_mix(text):
+    """Parse ROLE=weight pairs such as SMPSMK=0.6,ASRAMA=0.4"""
+    mix = {}
+    for item in text.split(","):
+        role, weight = item.split("=")
+        mix[role.strip().upper()] = float(weight)
+    return mix
+
+
+def _jam(rng, hour, spread, dot_rate, seconds_rate):
+    menit = max(0, min(23 * 60 + 59, hour * 60 + int(rng.gauss(0, spread))))
+    sep = "." if rng.random() < dot_rate else ":"
+    jam = f"{menit // 60:02d}{sep}{menit % 60:02d}"
+    if rng.random() < seconds_rate:
+        jam += f"{sep}{rng.randint(0, 59):02d}"
+    return jam
+
+
+def punch_cell(rng, role, absent_rate=0.05, holiday_rate=0.05, single_rate=0.05,
+               extra_punches=0.05, dot_rate=0.1, seconds_rate=0.05):
+    """Text of one day cell: empty, holiday or newline-separated punch times.
+
+    ``extra_punches`` is the mean number of punches beyond the regular two.
+    """
+    roll = rng.random()
+    if roll < absent_rate:
+        return None
+    if roll < absent_rate + holiday_rate:
+        return "L"
+
+    if role == "SMPSMK":
+        jam = [(7, 10), (15, 15)]
+    else:
+        # Evening check-in today; the morning check-out lands in tomorrow's cell
+        jam = [(6, 20), (15, 10)]
+    if rng.random() < single_rate:
+        jam = [rng.choice(jam)]
+    while rng.random() < extra_punches / (1 + extra_punches):
+        jam.insert(1, (12, 120))
+
+    return "\n".join(_jam(rng, hour, spread, dot_rate, seconds_rate) for hour, spread in jam)
+
+
+def day_numbers(n_days, start_day=21, month_length=30):
+    """Day-of-month header that rolls over into the next month"""
+    return [(start_day - 1 + i) % month_length + 1 for i in range(n_days)]
+
+
+def write_workbook(path, n_employees, n_days, seed=0, role_mix=None, start_day=21, **cell_options):
+    """Write a synthetic attendance workbook; ``cell_options`` go to :func:`punch_cell`"""
+    rng = random.Random(seed)
+    role_mix = role_mix or DEFAULT_ROLE_MIX
+    roles, weights = list(role_mix), list(role_mix.values())
+
+    book = Workbook(write_only=True)
+    sheet = book.create_sheet("Absensi")
+
+    sheet.append(["REKAP ABSENSI"])
+    sheet.append([])
+    sheet.append([])
+    sheet.append([])
+    sheet.append(["Nama", "Jabatan"] + day_numbers(n_days, start_day))
+    for i in range(n_employees):
+        role = rng.choices(roles, weights)[0]
+        sheet.append(
+            [f"Pegawai {i + 1}", role]
+            + [punch_cell(rng, role, **cell_options) for _ in range(n_days)]
+        )
+
+    book.save(path)
+    return path
@@ -0,0 +1,164 @@
+"""Attendance recap engine, independent of the Streamlit UI."""
+
+from rekap.classify import (
+    AttendanceMasks,
+    ShiftTimes,
+    apply_thresholds,
+    besok,
+    classify_overnight,
+    classify_smpsmk,
+    grid_rows,
+    overnight_shifts,
+    smpsmk_shifts,
+)
+from rekap.engine import (
+    COUNT_COLUMNS,
+    DATE_COLUMNS,
+    OVERNIGHT_ROLES,
+    RECAP_COLUMNS,
+    DaySets,
+    ParsedCells,
+    PreparedSheet,
+    add_dates,
+    apply_schedule,
+    classify_attendance,
+    classify_parsed,
+    classify_shifts,
+    compute_recap,
+    debug_cells,
+    debug_records,
+    merge_recaps,
+    parse_rows,
+    parse_sheet,
+    prepare_sheet,
+    prepared_debug,
+    recap_frame,
+    recap_prepared,
+    recap_rows,
+    recap_table,
+    role_thresholds,
+    sheet_dates,
+    sheet_employees,
+)
+from rekap.distribution import WEEKDAYS, merge_histograms, punch_histogram, punch_quantiles
+from rekap.incremental import RecapState, load_state, save_state, update_recap
+from rekap.parsing import (
+    NO_PUNCH,
+    PunchGrid,
+    jam_ke_menit,
+    menit_ke_jam,
+    grid_from_events,
+    parse_grid,
+    parse_jam,
+    punch_events,
+    parse_tanggal_header,
+    valid_jam_smpsmk,
+)
+from rekap.performance import (
+    BADGE_CLASSES,
+    PERFORMANCE_BANDS,
+    PERFORMANCE_COLORS,
+    PERFORMANCE_ICONS,
+    get_performance_badge,
+    highlight_performance,
+    performance_css,
+    performance_bands,
+    performance_labels,
+    style_performance,
+)
+from rekap.profiling import NULL_TIMER, StageTimer, format_profile
+from rekap.progress import ProgressReporter, ProgressUpdate, format_progress, log_sink
+from rekap.reporting import index_months, monthly_counts, multi_month_report, report_window
+from rekap.settings import DEFAULT_ROLE, DEFAULT_ROLE_SETTINGS, Period, normalize_role
+from rekap.store import StoredSheet, read_events, read_index, recap_stored, store_sheet
+from rekap.sweep import cutoff_range, merge_sweeps, threshold_sweep
+
+__all__ = [
+    "AttendanceMasks",
+    "BADGE_CLASSES",
+    "COUNT_COLUMNS",
+    "DATE_COLUMNS",
+    "DEFAULT_ROLE",
+    "DEFAULT_ROLE_SETTINGS",
+    "DaySets",
+    "NO_PUNCH",
+    "NULL_TIMER",
+    "OVERNIGHT_ROLES",
+    "PERFORMANCE_BANDS",
+    "PERFORMANCE_COLORS",
+    "PERFORMANCE_ICONS",
+    "ParsedCells",
+    "Period",
+    "PreparedSheet",
+    "ProgressReporter",
+    "ProgressUpdate",
+    "PunchGrid",
+    "RECAP_COLUMNS",
+    "RecapState",
+    "ShiftTimes",
+    "StageTimer",
+    "StoredSheet",
+    "WEEKDAYS",
+    "add_dates",
+    "apply_schedule",
+    "apply_thresholds",
+    "besok",
+    "classify_attendance",
+    "classify_overnight",
+    "classify_parsed",
+    "classify_shifts",
+    "classify_smpsmk",
+    "compute_recap",
+    "cutoff_range",
+    "debug_cells",
+    "debug_records",
+    "format_profile",
+    "format_progress",
+    "get_performance_badge",
+    "grid_from_events",
+    "grid_rows",
+    "highlight_performance",
+    "index_months",
+    "jam_ke_menit",
+    "load_state",
+    "log_sink",
+    "menit_ke_jam",
+    "merge_histograms",
+    "merge_recaps",
+    "merge_sweeps",
+    "monthly_counts",
+    "multi_month_report",
+    "normalize_role",
+    "overnight_shifts",
+    "parse_grid",
+    "parse_jam",
+    "parse_rows",
+    "parse_sheet",
+    "parse_tanggal_header",
+    "performance_bands",
+    "performance_css",
+    "performance_labels",
+    "prepare_sheet",
+    "prepared_debug",
+    "punch_events",
+    "punch_histogram",
+    "punch_quantiles",
+    "read_events",
+    "read_index",
+    "recap_frame",
+    "recap_prepared",
+    "recap_rows",
+    "recap_stored",
+    "recap_table",
+    "report_window",
+    "role_thresholds",
+    "save_state",
+    "sheet_dates",
+    "sheet_employees",
+    "smpsmk_shifts",
+    "store_sheet",
+    "style_performance",
+    "threshold_sweep",
+    "update_recap",
+    "valid_jam_smpsmk",
+]
@@ -0,0 +1,5 @@
+import sys
+
+from rekap.cli import main
+
+sys.exit(main())
@@ -0,0 +1,45 @@
+"""Background parsing of uploads, started before the settings are final.
+
+Reading a workbook and parsing its punch cells need neither the period nor
+the schedule (see :func:`rekap.engine.parse_sheet`). :class:`ParseJob` runs
+both on an executor thread as soon as the bytes arrive; the caller keeps the
+job (e.g. in the session), shows :attr:`ParseJob.latest` as progress and only
+blocks on :meth:`ParseJob.result` once it needs the cells. Classifying them
+with the chosen settings (:func:`rekap.engine.classify_parsed`) is then the
+only step left.
+"""
+
+import io
+
+from rekap.engine import parse_sheet
+from rekap.profiling import StageTimer
+from rekap.progress import ProgressReporter
+from rekap.reader import read_workbook
+
+
+class ParseJob:
+    """Read and parse one sheet of a workbook on ``executor``; the result is ``(frame, cells)``"""
+
+    def __init__(self, executor, data, sheet_name=0, engine="auto"):
+        self.timer = StageTimer()  # read and cells stages, as measured on the worker
+        self.latest = None  # last ProgressUpdate of the cells stage
+        self.future = executor.submit(self._run, data, sheet_name, engine)
+
+    def _report(self, update):
+        self.latest = update
+
+    def _run(self, data, sheet_name, engine):
+        with self.timer.stage("read") as stage:
+            frame = read_workbook(io.BytesIO(data), engine, sheet_name)
+            stage["rows"] = len(frame)
+        reporter = ProgressReporter(self._report)
+        cells = parse_sheet(frame, self.timer, reporter)
+        reporter.finish()
+        return frame, cells
+
+    def done(self):
+        return self.future.done()
+
+    def result(self, timeout=None):
+        """``(frame, cells)``, waiting up to ``timeout`` seconds; re-raises the worker's error"""
+        return self.future.result(timeout)
@@ -0,0 +1,133 @@
+"""Vectorized attendance classification over employees x days matrices."""
+
+from typing import NamedTuple
+
+import numpy as np
+
+from rekap.parsing import NO_PUNCH, PunchGrid
+
+
+class AttendanceMasks(NamedTuple):
+    """Boolean employees x days matrices, one per attendance issue"""
+    tidak_absen: np.ndarray  # no punch at all
+    absen_kurang: np.ndarray  # incomplete: a single punch, or check-in/out missing
+    absen_bermasalah: np.ndarray  # more than two punches
+    telat_masuk: np.ndarray  # checked in after jam_masuk
+    pulang_cepat: np.ndarray  # checked out before jam_pulang
+
+    @classmethod
+    def empty(cls, shape):
+        return cls(*(np.zeros(shape, dtype=bool) for _ in cls._fields))
+
+    def assign(self, rows, other):
+        """Copy the masks of ``other`` into the given rows"""
+        for mask, part in zip(self, other):
+            mask[rows] = part
+
+
+class ShiftTimes(NamedTuple):
+    """Check-in and check-out minute of every employee and day, before any threshold"""
+    lengkap: np.ndarray  # bool, active day with both a check-in and a check-out
+    masuk: np.ndarray  # int16, check-in minute or NO_PUNCH
+    pulang: np.ndarray  # int16, check-out minute or NO_PUNCH
+
+    @classmethod
+    def empty(cls, shape):
+        return cls(
+            np.zeros(shape, dtype=bool), np.full(shape, NO_PUNCH, dtype=np.int16),
+            np.full(shape, NO_PUNCH, dtype=np.int16)
+        )
+
+    def assign(self, rows, other):
+        """Copy the shift times of ``other`` into the given rows"""
+        for values, part in zip(self, other):
+            values[rows] = part
+
+
+def grid_rows(grid, rows):
+    """Select the given employee rows of a PunchGrid"""
+    return PunchGrid(*(values[rows] for values in grid))
+
+
+def apply_thresholds(masks, shifts, batas_masuk, batas_pulang):
+    """Late check-in and early check-out masks of complete shifts, filled into ``masks``.
+
+    ``batas_masuk`` and ``batas_pulang`` are per-employee limits in minutes
+    since midnight; this is the only step that depends on the schedule.
+    """
+    return masks._replace(
+        telat_masuk=shifts.lengkap & (shifts.masuk > np.asarray(batas_masuk)[:, None]),
+        pulang_cepat=shifts.lengkap & (shifts.pulang < np.asarray(batas_pulang)[:, None]),
+    )
+
+
+def smpsmk_shifts(grid, hari_kerja):
+    """Day-shift (SMPSMK) issue masks that need no schedule, and the shift times.
+
+    ``hari_kerja`` flags the day columns with a valid date. The late and early
+    masks are left empty for :func:`apply_thresholds`.
+    """
+    aktif = np.asarray(hari_kerja, dtype=bool)[None, :] & ~grid.holiday
+    kosong = np.zeros(grid.count.shape, dtype=bool)
+
+    # First punch is the check-in, last punch the check-out
+    masks = AttendanceMasks(
+        tidak_absen=aktif & (grid.count == 0),
+        absen_kurang=aktif & (grid.count == 1),
+        absen_bermasalah=aktif & (grid.count > 2),
+        telat_masuk=kosong,
+        pulang_cepat=kosong,
+    )
+    return masks, ShiftTimes(aktif & (grid.count >= 2), grid.first, grid.last)
+
+
+def classify_smpsmk(grid, hari_kerja, batas_masuk, batas_pulang):
+    """Classify day-shift (SMPSMK) attendance for every employee and day at once.
+
+    ``hari_kerja`` flags the day columns with a valid date, ``batas_masuk`` and
+    ``batas_pulang`` are per-employee limits in minutes since midnight.
+    """
+    return apply_thresholds(*smpsmk_shifts(grid, hari_kerja), batas_masuk, batas_pulang)
+
+
+def besok(values, fill):
+    """Shift a per-day matrix one column left, so column i holds day i+1"""
+    shifted = np.full_like(values, fill)
+    shifted[:, :-1] = values[:, 1:]
+    return shifted
+
+
+def overnight_shifts(grid, hari_kerja):
+    """Overnight (ASRAMA/MUSYRIF) issue masks that need no schedule, and the shift times.
+
+    The shift of day i runs from the last punch of day i to the first punch of
+    day i+1, and is skipped when either day is a holiday. The late and early
+    masks are left empty for :func:`apply_thresholds`.
+    """
+    jumlah_besok = besok(grid.count, 0)
+    masuk = grid.last
+    pulang = besok(grid.first, NO_PUNCH)
+
+    aktif = np.asarray(hari_kerja, dtype=bool)[None, :] & ~grid.holiday & ~besok(grid.holiday, False)
+    total = grid.count + jumlah_besok
+    ada_keduanya = (masuk != NO_PUNCH) & (pulang != NO_PUNCH)
+    kosong = np.zeros(grid.count.shape, dtype=bool)
+
+    masks = AttendanceMasks(
+        tidak_absen=aktif & (total == 0),
+        absen_kurang=aktif & ((total == 1) | ((total >= 2) & ~ada_keduanya)),
+        # Allow 2 entries per day (instead of 2 total across both days)
+        absen_bermasalah=aktif & ((grid.count > 2) | (jumlah_besok > 2)),
+        telat_masuk=kosong,
+        pulang_cepat=kosong,
+    )
+    return masks, ShiftTimes(aktif & (total >= 2) & ada_keduanya, masuk, pulang)
+
+
+def classify_overnight(grid, hari_kerja, batas_masuk, batas_pulang):
+    """Classify overnight (ASRAMA/MUSYRIF) shifts for every employee and day at once.
+
+    Arguments are the same as for :func:`classify_smpsmk`; see
+    :func:`overnight_shifts` for how a shift is formed.
+    """
+    return apply_thresholds(*overnight_shifts(grid, hari_kerja), batas_masuk, batas_pulang)
@@ -0,0 +1,244 @@
+"""Command-line batch recap of many attendance workbooks.
+
+Example::
+
+    python -m rekap data/*.xlsx --start-month 6 --end-month 7 --year 2025 \
+        --schedule SMPSMK=07:00-15:00 --output-dir rekap_out
+"""
+
+import argparse
+import calendar
+import csv
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from rekap.engine import compute_recap, role_thresholds
+from rekap.incremental import load_state, save_state, update_recap
+from rekap.progress import ProgressReporter, log_sink
+from rekap.reader import READERS, read_workbook
+from rekap.settings import DEFAULT_ROLE_SETTINGS, Period
+from rekap.reporting import index_months
+from rekap.store import period_id, save_sheet, update_index
+from rekap.streaming import EXPORT_COLUMNS, iter_recap, write_recap_csv
+
+BULAN = {name.lower(): number for number, name in enumerate(calendar.month_name) if name}
+
+
+def parse_bulan(value):
+    """Month as a number (1-12) or an English month name"""
+    if value.isdigit() and 1 <= int(value) <= 12:
+        return int(value)
+    if value.lower() in BULAN:
+        return BULAN[value.lower()]
+    raise argparse.ArgumentTypeError(f"invalid month {value!r}")
+
+
+def parse_jadwal(value):
+    """ROLE=HH:MM-HH:MM schedule override"""
+    try:
+        role, jam = value.split("=", 1)
+        jam_masuk, jam_pulang = jam.split("-", 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid schedule {value!r}, expected ROLE=HH:MM-HH:MM")
+    return role.strip().upper(), jam_masuk.strip(), jam_pulang.strip()
+
+
+def find_workbooks(inputs):
+    """Expand directories and glob patterns into a sorted list of .xlsx files"""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(glob.glob(os.path.join(item, "*.xlsx")))
+        else:
+            paths.extend(glob.glob(item) or [item])
+    # Skip Excel's lock files (~$name.xlsx)
+    return sorted({p for p in paths if not os.path.basename(p).startswith("~$")})
+
+
+def workbook_keys(paths):
+    """Name of each workbook's outputs: its path relative to the folder all inputs share.
+
+    Workbooks from one folder are keyed by their file name, while
+    ``data/a/absensi.xlsx`` and ``data/b/absensi.xlsx`` become
+    ``a/absensi.xlsx`` and ``b/absensi.xlsx``.
+    """
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths])
+    return {path: os.path.relpath(os.path.abspath(path), root) for path in paths}
+
+
+def _recap_path(key, output_dir):
+    return os.path.join(output_dir, f"{os.path.splitext(key)[0]}_recap.csv")
+
+
+def _state_path(key, state_dir):
+    return os.path.join(state_dir, f"{key}.state.pkl")
+
+
+def process_workbook(path, settings, period, output_dir, reader="auto", stream=False, state_dir=None, store_dir=None,
+                     progress=False, key=None):
+    """Recap one workbook and write its CSV; runs inside a worker process.
+
+    ``key`` names the workbook's CSV, state and stored sheet (default: its
+    file name, see :func:`workbook_keys`). With ``state_dir`` the previous
+    run's per-day results of the same workbook are reused and only new or
+    edited cells are processed. With ``store_dir`` the sheet's punches are
+    saved to the punch store. With ``progress`` rows/s and ETA are logged to
+    stderr. Returns the number of employees, the elapsed seconds and the store
+    index record (or None).
+    """
+    start = time.perf_counter()
+    key = key or os.path.basename(path)
+    recap_path = _recap_path(key, output_dir)
+    os.makedirs(os.path.dirname(recap_path), exist_ok=True)
+    if stream:
+        reporter = ProgressReporter(log_sink(key)) if progress else None
+        rows = iter_recap(path, settings, period, progress=reporter)
+        jumlah = write_recap_csv(rows, recap_path)
+        if reporter is not None:
+            reporter.finish()
+        return jumlah, time.perf_counter() - start, None
+
+    frame = read_workbook(path, engine=reader)
+    reporter = ProgressReporter(log_sink(key)) if progress else None
+    if state_dir is None:
+        df_hasil = compute_recap(frame, settings, period, progress=reporter)
+    else:
+        state_path = _state_path(key, state_dir)
+        os.makedirs(os.path.dirname(state_path), exist_ok=True)
+        df_hasil, state = update_recap(frame, settings, period, state=load_state(state_path), progress=reporter)
+        save_state(state, state_path)
+    if reporter is not None:
+        reporter.finish()
+
+    export_df = df_hasil.drop(['Badge_Class'], axis=1)
+    export_df.to_csv(recap_path, index=False)
+
+    # The index is updated once by the main process, not by every worker
+    record = save_sheet(store_dir, frame, period, key) if store_dir else None
+    return len(export_df), time.perf_counter() - start, record
+
+
+def write_combined_report(keys, output_dir, report):
+    """Concatenate the per-workbook CSVs (by :func:`workbook_keys` key) line by line, tagging each row with its source"""
+    with open(report, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle, lineterminator=os.linesep)
+        writer.writerow(EXPORT_COLUMNS + ["Sumber"])
+        jumlah = 0
+        for key in keys:
+            sumber = key.replace(os.sep, "/")
+            with open(_recap_path(key, output_dir), newline="", encoding="utf-8") as recap:
+                reader = csv.reader(recap)
+                next(reader, None)
+                for row in reader:
+                    writer.writerow(row + [sumber])
+                    jumlah += 1
+    return jumlah
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m rekap",
+        description="Recap attendance workbooks without the Streamlit app."
+    )
+    parser.add_argument("inputs", nargs="+", help="workbooks, directories or glob patterns")
+    parser.add_argument("--start-month", type=parse_bulan, required=True, help="first month of the sheet header")
+    parser.add_argument("--end-month", type=parse_bulan, required=True, help="month after the day numbers roll over")
+    parser.add_argument("--year", type=int, required=True)
+    parser.add_argument(
+        "--schedule", type=parse_jadwal, action="append", default=[], metavar="ROLE=IN-OUT",
+        help="override a role schedule, e.g. SMPSMK=07:00-15:00 (repeatable)"
+    )
+    parser.add_argument("--output-dir", default="rekap_output", help="where recap CSVs are written")
+    parser.add_argument(
+        "--reader", choices=["auto", *READERS], default="auto",
+        help="Excel reader backend (auto: calamine if installed, else streaming openpyxl)"
+    )
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="stream rows from each workbook to its CSV with bounded memory (ignores --reader)"
+    )
+    parser.add_argument(
+        "--state-dir",
+        help="keep per-day results here and, on later runs, only process new or edited days (ignored with --stream)"
+    )
+    parser.add_argument(
+        "--store", metavar="DIR",
+        help="also save each sheet's punches to this Parquet punch store (ignored with --stream)"
+    )
+    parser.add_argument("--progress", action="store_true", help="log rows/s and ETA of each workbook to stderr")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    settings = {role: dict(jadwal) for role, jadwal in DEFAULT_ROLE_SETTINGS.items()}
+    for role, jam_masuk, jam_pulang in args.schedule:
+        if role not in settings:
+            sys.exit(f"error: unknown role {role!r}, expected one of {', '.join(settings)}")
+        settings[role].update(jam_masuk=jam_masuk, jam_pulang=jam_pulang)
+    try:
+        role_thresholds(settings)
+    except ValueError as e:
+        sys.exit(f"error: {e}")
+
+    paths = find_workbooks(args.inputs)
+    if not paths:
+        sys.exit("error: no .xlsx workbooks found")
+
+    period = Period(args.start_month, args.end_month, args.year)
+    keys = workbook_keys(paths)
+    if args.store and not args.stream:
+        stored = {}
+        for path, key in keys.items():
+            pid = period_id(key)
+            if pid in stored:
+                sys.exit(f"error: {stored[pid]} and {path} would share the punch store entry {pid!r}")
+            stored[pid] = path
+    os.makedirs(args.output_dir, exist_ok=True)
+    for folder in (args.state_dir, args.store):
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+    start = time.perf_counter()
+    berhasil, gagal, records = [], [], []
+    # One workbook per worker process
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {
+            pool.submit(
+                process_workbook, path, settings, period, args.output_dir,
+                args.reader, args.stream, args.state_dir, args.store, args.progress, keys[path]
+            ): path
+            for path in paths
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            path = futures[future]
+            try:
+                jumlah, elapsed, record = future.result()
+            except Exception as e:
+                gagal.append(path)
+                print(f"[{done}/{len(paths)}] {path}: FAILED ({e})", file=sys.stderr)
+                continue
+            berhasil.append(path)
+            if record is not None:
+                records.append(record)
+            print(f"[{done}/{len(paths)}] {path}: {jumlah} employees in {elapsed:.2f}s")
+
+    if berhasil:
+        bulan_awal = calendar.month_name[period.bulan_awal]
+        bulan_akhir = calendar.month_name[period.bulan_akhir]
+        report = os.path.join(args.output_dir, f"attendance_report_{bulan_awal}_{bulan_akhir}_{period.tahun}.csv")
+        jumlah = write_combined_report([keys[path] for path in sorted(berhasil)], args.output_dir, report)
+        print(f"Combined report: {report} ({jumlah} employees from {len(berhasil)} workbooks)")
+
+    if records:
+        update_index(args.store, records)
+        index_months(args.store, settings)
+        print(f"Punch store: {args.store} ({len(records)} sheets indexed)")
+
+    print(f"Done in {time.perf_counter() - start:.2f}s, {len(berhasil)} succeeded, {len(gagal)} failed")
+    return 1 if gagal else 0
@@ -0,0 +1,81 @@
+"""Distribution of first and last punch times per employee, role and weekday.
+
+The index is a sparse histogram built once from the parsed grid: one row per
+employee, weekday, punch (first or last of the day) and minute bin that
+actually occurs. Its size is bounded by the number of punches, and any view
+(one employee, a role, some weekdays) is a sum over its rows; quantiles are
+read from cumulative counts instead of rescanning the cells.
+"""
+
+import numpy as np
+import pandas as pd
+
+from rekap.parsing import NO_PUNCH
+
+HISTOGRAM_COLUMNS = ["employee", "role", "weekday", "punch", "menit", "count"]
+QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def punch_histogram(grid, roles, tanggal_final, bin_minutes=1):
+    """Count of first and last punches per employee, weekday (0 = Monday) and minute bin.
+
+    ``menit`` is the start of each bin in minutes since midnight; undated day
+    columns and days without punches are left out.
+    """
+    weekday = np.array([tgl.weekday() if tgl is not None else -1 for tgl in tanggal_final], dtype=np.int64)
+    jumlah_bin = -(-24 * 60 // bin_minutes)
+
+    frames = []
+    for punch, values in (("first", grid.first), ("last", grid.last)):
+        rows, cols = np.nonzero((values != NO_PUNCH) & (weekday >= 0)[None, :])
+        # One integer key per (employee, weekday, bin); unique() counts them all at once
+        key = (rows * 7 + weekday[cols]) * jumlah_bin + values[rows, cols] // bin_minutes
+        kode, count = np.unique(key, return_counts=True)
+        employee, sisa = np.divmod(kode, 7 * jumlah_bin)
+        hari, kotak = np.divmod(sisa, jumlah_bin)
+        frames.append(pd.DataFrame({
+            "employee": employee.astype(np.int32),
+            "weekday": hari.astype(np.int8),
+            "punch": punch,
+            "menit": (kotak * bin_minutes).astype(np.int16),
+            "count": count.astype(np.int32),
+        }))
+
+    hist = pd.concat(frames, ignore_index=True)
+    hist.insert(1, "role", pd.Categorical(np.asarray(roles, dtype=object)[hist["employee"].to_numpy()]))
+    hist["punch"] = pd.Categorical(hist["punch"], categories=["first", "last"])
+    return hist[HISTOGRAM_COLUMNS]
+
+
+def merge_histograms(hists, sizes):
+    """Histograms of several sheets as one; employees are renumbered as rows of the sheets stacked in order.
+
+    ``sizes`` is the number of employees of each sheet.
+    """
+    offsets = np.cumsum([0, *sizes[:-1]])
+    hist = pd.concat(
+        [part.assign(employee=(part["employee"] + offset).astype(np.int32)) for part, offset in zip(hists, offsets)],
+        ignore_index=True
+    )
+    hist["role"] = hist["role"].astype("category")
+    return hist
+
+
+def punch_quantiles(hist, by=("employee",), quantiles=QUANTILES):
+    """Number of punches and punch-time quantiles of every group in ``by`` (plus the punch kind).
+
+    Each quantile is the first minute bin whose cumulative count reaches it,
+    in minutes since midnight.
+    """
+    by = [*by, "punch"] if "punch" not in by else list(by)
+    hist = hist.groupby([*by, "menit"], observed=True, sort=True)["count"].sum().reset_index()
+    group = hist.groupby(by, observed=True, sort=False)["count"]
+    cum = group.cumsum()
+    total = group.transform("sum")
+
+    result = group.sum().to_frame()
+    for q in quantiles:
+        sampai = hist[cum >= q * total].groupby(by, observed=True, sort=False).head(1)
+        result[f"p{round(q * 100)}"] = sampai.set_index(by)["menit"]
+    return result.reset_index()
@@ -0,0 +1,403 @@
+"""Per-employee attendance classification and recap table."""
+
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from rekap.classify import (
+    AttendanceMasks,
+    ShiftTimes,
+    apply_thresholds,
+    besok,
+    grid_rows,
+    overnight_shifts,
+    smpsmk_shifts,
+)
+from rekap.parsing import PunchGrid, jam_ke_menit, menit_ke_jam, parse_grid, parse_tanggal_header
+from rekap.performance import performance_bands
+from rekap.profiling import NULL_TIMER
+from rekap.settings import normalize_role
+
+# Layout of the attendance sheet: date header row, first data row, first day column
+HEADER_ROW = 4
+FIRST_DATA_ROW = 5
+FIRST_DAY_COL = 2
+
+RECAP_COLUMNS = [
+    "Nama", "Role", "Performance", "Badge_Class",
+    "Tidak Absen", "Tanggal Tidak Absen",
+    "Absen Tidak Lengkap", "Tanggal Absen Kurang",
+    "Hari Absen >2x", "Tanggal Absen >2x",
+    "Telat Masuk", "Tanggal Telat Masuk",
+    "Pulang Cepat", "Tanggal Pulang Cepat"
+]
+
+# Recap count column and date-list column of each issue mask
+COUNT_COLUMNS = {
+    "tidak_absen": "Tidak Absen",
+    "absen_kurang": "Absen Tidak Lengkap",
+    "absen_bermasalah": "Hari Absen >2x",
+    "telat_masuk": "Telat Masuk",
+    "pulang_cepat": "Pulang Cepat",
+}
+DATE_COLUMNS = {
+    "tidak_absen": "Tanggal Tidak Absen",
+    "absen_kurang": "Tanggal Absen Kurang",
+    "absen_bermasalah": "Tanggal Absen >2x",
+    "telat_masuk": "Tanggal Telat Masuk",
+    "pulang_cepat": "Tanggal Pulang Cepat",
+}
+
+
+# Parsing reports progress after each chunk of employee rows: at most
+# PARSE_CHUNKS chunks, none smaller than PARSE_CHUNK_ROWS
+PARSE_CHUNKS = 20
+PARSE_CHUNK_ROWS = 256
+
+# Roles whose shift starts in the evening and ends the next morning; every
+# other role follows the day (SMPSMK) schedule
+OVERNIGHT_ROLES = ("ASRAMA", "MUSYRIF")
+
+
+def role_thresholds(settings):
+    """Check-in and check-out limits of each role, in minutes since midnight"""
+    return {
+        role: (jam_ke_menit(jadwal["jam_masuk"]), jam_ke_menit(jadwal["jam_pulang"]))
+        for role, jadwal in settings.items()
+    }
+
+
+def debug_cells(catat_debug, limit=None, seed=0):
+    """(employee, day) positions of the flagged cells in sheet order; at most ``limit``, sampled at random"""
+    cells = np.argwhere(catat_debug)
+    if limit is not None and len(cells) > limit:
+        pilih = np.random.default_rng(seed).choice(len(cells), size=limit, replace=False)
+        cells = cells[np.sort(pilih)]
+    return cells
+
+
+def debug_records(catat_debug, grid, data_absensi, nama_guru, roles, overnight, tanggal_final, limit=None, seed=0):
+    """Rows of the "incomplete attendance" debug table for the flagged cells.
+
+    With ``limit`` only a random sample of that many cells is formatted.
+    """
+    jumlah_hari = data_absensi.shape[1]
+    records = []
+
+    for idx, i in debug_cells(catat_debug, limit, seed):
+        tanggal = tanggal_final[i].strftime("%d-%b")
+        if not overnight[idx]:
+            records.append({
+                'nama': nama_guru[idx],
+                'role': roles[idx],
+                'tanggal': tanggal,
+                'isi_cell': str(data_absensi[idx, i]),
+                'jam_parsed': [menit_ke_jam(grid.first[idx, i])],
+                'total_entries': 1,
+                'kategori': 'Absen Tidak Lengkap'
+            })
+            continue
+
+        ada_besok = i+1 < jumlah_hari
+        ada_hari_ini = grid.count[idx, i] > 0
+        records.append({
+            'nama': nama_guru[idx],
+            'role': roles[idx],
+            'tanggal': tanggal,
+            'isi_hari_ini': str(data_absensi[idx, i]),
+            'isi_besok': str(data_absensi[idx, i+1]) if ada_besok else "N/A",
+            'jam_hari_ini': [menit_ke_jam(grid.last[idx, i])] if ada_hari_ini else [],
+            'jam_besok': [] if ada_hari_ini else [menit_ke_jam(grid.first[idx, i+1])],
+            'total_entries': 1,
+            'kategori': 'Absen Tidak Lengkap'
+        })
+    return records
+
+
+def sheet_dates(frame, period):
+    """Dates of the day columns, from the header row of the raw sheet"""
+    tanggal_header = frame.iloc[HEADER_ROW, FIRST_DAY_COL:].tolist()
+    return parse_tanggal_header(tanggal_header, period)
+
+
+def sheet_employees(frame, jumlah_hari):
+    """Names, raw roles and the employees x days block of punch cells"""
+    nama_guru = frame.iloc[FIRST_DATA_ROW:, 0].dropna().tolist()
+    role_guru = frame.iloc[FIRST_DATA_ROW:, 1].tolist()[:len(nama_guru)]
+    data_absensi = frame.iloc[FIRST_DATA_ROW:FIRST_DATA_ROW+len(nama_guru), FIRST_DAY_COL:FIRST_DAY_COL+jumlah_hari].to_numpy(dtype=object)
+    return nama_guru, role_guru, data_absensi
+
+
+def classify_shifts(grid, roles, hari_kerja):
+    """Issue masks that need no schedule, shift times and debug-table cells of every employee and day.
+
+    ``roles`` are normalized role names, one per grid row, and ``hari_kerja``
+    flags the day columns that carry a valid date. The late and early masks
+    are filled in by :func:`apply_schedule`.
+    """
+    overnight = np.array([role in OVERNIGHT_ROLES for role in roles], dtype=bool)
+    masks = AttendanceMasks.empty(grid.count.shape)
+    shifts = ShiftTimes.empty(grid.count.shape)
+    catat_debug = np.zeros(grid.count.shape, dtype=bool)
+
+    # Day staff: every employee and day classified at once
+    harian = np.flatnonzero(~overnight)
+    masks_harian, shifts_harian = smpsmk_shifts(grid_rows(grid, harian), hari_kerja)
+    masks.assign(harian, masks_harian)
+    shifts.assign(harian, shifts_harian)
+    catat_debug[harian] = masks_harian.absen_kurang
+
+    # Overnight staff: today's last punch against tomorrow's first punch
+    malam = np.flatnonzero(overnight)
+    grid_malam = grid_rows(grid, malam)
+    masks_malam, shifts_malam = overnight_shifts(grid_malam, hari_kerja)
+    masks.assign(malam, masks_malam)
+    shifts.assign(malam, shifts_malam)
+    catat_debug[malam] = masks_malam.absen_kurang & (grid_malam.count + besok(grid_malam.count, 0) == 1)
+
+    return masks, shifts, catat_debug
+
+
+def apply_schedule(masks, shifts, roles, settings):
+    """Late check-in and early check-out masks for the schedule in ``settings``"""
+    batas = role_thresholds(settings)
+    batas_masuk = np.array([batas[role][0] for role in roles], dtype=np.int16)
+    batas_pulang = np.array([batas[role][1] for role in roles], dtype=np.int16)
+    return apply_thresholds(masks, shifts, batas_masuk, batas_pulang)
+
+
+def classify_attendance(grid, roles, hari_kerja, settings):
+    """Issue masks of every employee and day, plus the cells shown in the debug table.
+
+    ``roles`` are normalized role names, one per grid row, and ``hari_kerja``
+    flags the day columns that carry a valid date.
+    """
+    masks, shifts, catat_debug = classify_shifts(grid, roles, hari_kerja)
+    return apply_schedule(masks, shifts, roles, settings), catat_debug
+
+
+class DaySets(NamedTuple):
+    """Issue days of every employee, packed eight day columns per byte"""
+    bits: AttendanceMasks  # uint8, employees x ceil(days / 8)
+    days: np.ndarray  # datetime64[D] date of each day column (NaT when undated)
+
+    @classmethod
+    def from_masks(cls, masks, tanggal_final):
+        days = np.array([tgl if tgl is not None else "NaT" for tgl in tanggal_final], dtype="datetime64[D]")
+        return cls(AttendanceMasks(*(np.packbits(mask, axis=1) for mask in masks)), days)
+
+    @classmethod
+    def concat(cls, parts):
+        """Rows of several DaySets in order, over the sorted union of their dated day columns"""
+        if all(np.array_equal(part.days, parts[0].days, equal_nan=True) for part in parts):
+            return cls(AttendanceMasks(*(np.concatenate(bits) for bits in zip(*(part.bits for part in parts)))), parts[0].days)
+
+        # Sheets with other day columns: days are matched by date, and a date repeated in a sheet keeps every issue
+        days = np.unique(np.concatenate([part.days[~np.isnat(part.days)] for part in parts]))
+        packed = []
+        for part in parts:
+            dated = ~np.isnat(part.days)
+            kolom = np.zeros((dated.sum(), len(days)), dtype=bool)
+            kolom[np.arange(len(kolom)), np.searchsorted(days, part.days[dated])] = True
+            packed.append([np.packbits(mask[:, dated] @ kolom, axis=1) for mask in part.masks()])
+        return cls(AttendanceMasks(*(np.concatenate(bits) for bits in zip(*packed))), days)
+
+    def masks(self, rows=slice(None)):
+        """Boolean issue masks of the given employee rows"""
+        return AttendanceMasks(*(
+            np.unpackbits(bits[rows], axis=1, count=len(self.days)).view(bool) for bits in self.bits
+        ))
+
+    def labels(self):
+        """"%d-%b" text of each day column ("" when undated)"""
+        return np.array([
+            "" if np.isnat(day) else day.item().strftime("%d-%b") for day in self.days
+        ], dtype=object)
+
+    def text(self, rows=slice(None)):
+        """Comma-separated issue dates of the given rows, keyed by their RECAP_COLUMNS name"""
+        labels = self.labels()
+        return {
+            DATE_COLUMNS[kategori]: [", ".join(labels[hari]) for hari in mask]
+            for kategori, mask in zip(AttendanceMasks._fields, self.masks(rows))
+        }
+
+
+def recap_table(nama_guru, roles, masks, tanggal_final):
+    """Compact recap: issue counts, categorical Role and Performance, and the issue days as :class:`DaySets`.
+
+    The summary's index is each employee's row in the DaySets; the date-list
+    columns are only rendered, for the rows that need them, by :func:`add_dates`.
+    """
+    total_working_days = sum(tgl is not None for tgl in tanggal_final)
+    jumlah = {kategori: mask.sum(axis=1) for kategori, mask in zip(AttendanceMasks._fields, masks)}
+    total_issues = jumlah["tidak_absen"] + jumlah["absen_kurang"] + jumlah["telat_masuk"] + jumlah["pulang_cepat"]
+    badge_class, badge_text = performance_bands(total_issues, total_working_days)
+
+    summary = pd.DataFrame({
+        "Nama": pd.Series(nama_guru, dtype=object),
+        "Role": pd.Categorical(roles),
+        "Performance": badge_text,
+        "Badge_Class": badge_class,
+        **{COUNT_COLUMNS[kategori]: jumlah[kategori] for kategori in AttendanceMasks._fields},
+    })
+    return summary, DaySets.from_masks(masks, tanggal_final)
+
+
+def add_dates(frame, day_sets):
+    """Rows of a :func:`recap_table` summary with their date-list columns, in RECAP_COLUMNS order (others last)"""
+    dates = pd.DataFrame(day_sets.text(frame.index.to_numpy()), index=frame.index)
+    frame = pd.concat([frame, dates], axis=1)
+    return frame[[column for column in RECAP_COLUMNS if column in frame] + [column for column in frame if column not in RECAP_COLUMNS]]
+
+
+def merge_recaps(recaps):
+    """One compact recap of several sheets, from ``{source: (summary, DaySets)}``.
+
+    Rows keep the order of ``recaps`` and get a ``Sumber`` column; the index
+    is renumbered to match the merged :class:`DaySets`.
+    """
+    summary = pd.concat(
+        [summary.assign(Sumber=source) for source, (summary, _) in recaps.items()], ignore_index=True
+    )
+    # Role categories differ from sheet to sheet
+    summary["Role"] = summary["Role"].astype("category")
+    summary["Sumber"] = pd.Categorical(summary["Sumber"], categories=list(recaps))
+    return summary, DaySets.concat([day_sets for _, day_sets in recaps.values()])
+
+
+def recap_rows(nama_guru, roles, masks, tanggal_final):
+    """Yield one recap row (a dict keyed by RECAP_COLUMNS) per employee"""
+    yield from recap_frame(nama_guru, roles, masks, tanggal_final).to_dict("records")
+
+
+def recap_frame(nama_guru, roles, masks, tanggal_final, progress=None):
+    """Full recap table of the classified masks; ``progress`` is called once it is built"""
+    frame = add_dates(*recap_table(nama_guru, roles, masks, tanggal_final))
+    if progress is not None and len(nama_guru):
+        progress(len(nama_guru), len(nama_guru))
+    return frame
+
+
+def parse_rows(data_absensi, progress=None):
+    """:func:`rekap.parsing.parse_grid` of the sheet, reporting ``progress(done, total)`` in employee rows"""
+    jumlah = len(data_absensi)
+    if progress is None or jumlah <= PARSE_CHUNK_ROWS:
+        grid = parse_grid(data_absensi)
+        if progress is not None and jumlah:
+            progress(jumlah, jumlah)
+        return grid
+
+    ukuran = max(PARSE_CHUNK_ROWS, -(-jumlah // PARSE_CHUNKS))
+    parts = []
+    progress(0, jumlah)
+    for start in range(0, jumlah, ukuran):
+        parts.append(parse_grid(data_absensi[start:start + ukuran]))
+        progress(min(start + ukuran, jumlah), jumlah)
+    return PunchGrid(*(np.concatenate(values) for values in zip(*parts)))
+
+
+class PreparedSheet(NamedTuple):
+    """Everything about a sheet that does not depend on the schedule thresholds"""
+    nama_guru: list
+    roles: list  # normalized role names
+    tanggal_final: list
+    data_absensi: np.ndarray  # raw punch cells, for the debug table
+    grid: PunchGrid
+    masks: AttendanceMasks  # late/early masks still empty
+    shifts: ShiftTimes
+    catat_debug: np.ndarray
+
+
+class ParsedCells(NamedTuple):
+    """Punch cells of a raw sheet, parsed without the period or the settings"""
+    tanggal_header: list  # raw day numbers of the header row
+    nama_guru: list
+    role_guru: list  # raw role cells
+    data_absensi: np.ndarray
+    grid: PunchGrid
+
+
+def parse_sheet(frame, timer=NULL_TIMER, progress=None):
+    """Parse every punch cell of a raw sheet; the slow part, and it needs no settings.
+
+    ``progress`` is called with ``(done, total)`` employee rows while parsing.
+    """
+    if frame.shape[0] <= FIRST_DATA_ROW or frame.shape[1] <= FIRST_DAY_COL:
+        raise ValueError(f"not an attendance sheet ({frame.shape[0]} rows x {frame.shape[1]} columns)")
+    with timer.stage("cells") as stage:
+        tanggal_header = frame.iloc[HEADER_ROW, FIRST_DAY_COL:].tolist()
+        nama_guru, role_guru, data_absensi = sheet_employees(frame, len(tanggal_header))
+        # Every cell is parsed once, up front, instead of once (or twice) per day
+        grid = parse_rows(data_absensi, progress)
+        stage["rows"] = len(nama_guru)
+    return ParsedCells(tanggal_header, nama_guru, role_guru, data_absensi, grid)
+
+
+def classify_parsed(cells, period, role_names, timer=NULL_TIMER):
+    """Date the day columns and classify the :class:`ParsedCells` of a sheet up to the schedule thresholds"""
+    with timer.stage("header") as stage:
+        tanggal_final = parse_tanggal_header(cells.tanggal_header, period)
+        stage["rows"] = len(tanggal_final)
+
+    with timer.stage("classify", rows=len(cells.nama_guru)):
+        roles = [normalize_role(role, role_names) for role in cells.role_guru]
+        hari_kerja = np.array([tgl is not None for tgl in tanggal_final], dtype=bool)
+        masks, shifts, catat_debug = classify_shifts(cells.grid, roles, hari_kerja)
+
+    return PreparedSheet(cells.nama_guru, roles, tanggal_final, cells.data_absensi, cells.grid, masks, shifts, catat_debug)
+
+
+def prepare_sheet(frame, period, role_names, timer=NULL_TIMER, progress=None):
+    """Parse and classify a raw sheet up to the schedule thresholds.
+
+    ``role_names`` are the configured roles (e.g. the keys of the settings);
+    the result can be recapped with any schedule by :func:`recap_prepared`.
+    ``progress`` is called with ``(done, total)`` employee rows while parsing.
+    """
+    return classify_parsed(parse_sheet(frame, timer, progress), period, role_names, timer)
+
+
+def prepared_debug(prepared, limit=None, seed=0):
+    """Debug-table rows of a :class:`PreparedSheet`, derived on demand from its masks (see :func:`debug_records`)"""
+    overnight = [role in OVERNIGHT_ROLES for role in prepared.roles]
+    return debug_records(
+        prepared.catat_debug, prepared.grid, prepared.data_absensi,
+        prepared.nama_guru, prepared.roles, overnight, prepared.tanggal_final, limit, seed
+    )
+
+
+def recap_prepared(prepared, settings, debug_info=None, progress=None, timer=NULL_TIMER, compact=False):
+    """Recap a :class:`PreparedSheet` with the schedule in ``settings``; only the thresholds are applied.
+
+    With ``compact`` the (summary, DaySets) pair of :func:`recap_table` is
+    returned instead of the full table.
+    """
+    with timer.stage("thresholds", rows=len(prepared.nama_guru)):
+        masks = apply_schedule(prepared.masks, prepared.shifts, prepared.roles, settings)
+
+    if debug_info is not None:
+        with timer.stage("debug") as stage:
+            records = prepared_debug(prepared)
+            debug_info.extend(records)
+            stage["rows"] = len(records)
+
+    with timer.stage("build", rows=len(prepared.nama_guru)):
+        if compact:
+            return recap_table(prepared.nama_guru, prepared.roles, masks, prepared.tanggal_final)
+        return recap_frame(prepared.nama_guru, prepared.roles, masks, prepared.tanggal_final, progress)
+
+
+def compute_recap(frame, settings, period, debug_info=None, progress=None, timer=NULL_TIMER):
+    """Compute the attendance recap for a raw sheet read with ``header=None``.
+
+    ``settings`` maps role names to their ``jam_masuk``/``jam_pulang`` schedule
+    and ``period`` is a :class:`rekap.settings.Period`. Incomplete records are
+    appended to ``debug_info`` when a list is given, ``progress`` is called
+    with ``(done, total)`` employee rows as they are parsed (see
+    :class:`rekap.progress.ProgressReporter`) and every stage is recorded on
+    ``timer`` (a :class:`rekap.profiling.StageTimer`).
+    """
+    prepared = prepare_sheet(frame, period, settings, timer, progress)
+    return recap_prepared(prepared, settings, debug_info, progress, timer)
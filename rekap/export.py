@@ -0,0 +1,138 @@
+"""Excel export of the recap with the performance-band colours of the app.
+
+The workbook is written with openpyxl's write-only (streaming) mode: rows go
+straight to the file as plain values and the date lists are rendered a chunk
+of employees at a time. The band colours of the Recap sheet are one
+conditional-format rule per band over the whole table, keyed on its
+Performance column, so no cell carries a style of its own however many rows
+there are; the few styled cells elsewhere share named styles.
+"""
+
+import io
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.formatting.rule import FormulaRule
+from openpyxl.styles import Font, NamedStyle, PatternFill
+from openpyxl.utils import get_column_letter
+
+from rekap.engine import add_dates
+from rekap.performance import PERFORMANCE_BANDS, PERFORMANCE_COLORS
+
+# Employees whose date lists are rendered at once
+EXPORT_CHUNK_ROWS = 1000
+# Columns of the app's recap that only drive its styling
+STYLE_COLUMNS = ["Badge_Class"]
+MAX_COLUMN_WIDTH = 60
+
+HEADER_STYLE = "Report Header"
+
+
+def band_style(band):
+    """Name of the workbook style of a performance band"""
+    return f"Band {band}"
+
+
+def summary_metrics(frame):
+    """Headline totals of a recap, as Metric/Value rows"""
+    return pd.DataFrame({
+        'Metric': ['Total Employees', 'Total Absences', 'Total Late Arrivals', 'Total Early Departures'],
+        'Value': [
+            len(frame),
+            frame['Tidak Absen'].sum(),
+            frame['Telat Masuk'].sum(),
+            frame['Pulang Cepat'].sum()
+        ]
+    })
+
+
+def _band_fill(band):
+    color = PERFORMANCE_COLORS[band].lstrip("#")
+    return PatternFill("solid", start_color=color, end_color=color)
+
+
+def _add_styles(book):
+    book.add_named_style(NamedStyle(name=HEADER_STYLE, font=Font(bold=True)))
+    for band in PERFORMANCE_COLORS:
+        book.add_named_style(NamedStyle(name=band_style(band), fill=_band_fill(band)))
+
+
+def _row(sheet, values, style=None):
+    """Cells of one row; unstyled rows are written as plain values"""
+    if style is None:
+        return list(values)
+    cells = []
+    for value in values:
+        cell = WriteOnlyCell(sheet, value)
+        cell.style = style
+        cells.append(cell)
+    return cells
+
+
+def _start_sheet(book, title, columns, sample):
+    """Sheet with its column widths (from the header and ``sample`` rows) and a bold header row"""
+    sheet = book.create_sheet(title)
+    for kolom, header in enumerate(columns):
+        width = max([len(str(header))] + [len(str(row[kolom])) for row in sample])
+        sheet.column_dimensions[get_column_letter(kolom + 1)].width = min(width + 2, MAX_COLUMN_WIDTH)
+    sheet.freeze_panes = "A2"
+    sheet.append(_row(sheet, columns, HEADER_STYLE))
+    return sheet
+
+
+def _records(frame):
+    """Rows of ``frame`` as plain Python values, read column by column"""
+    return list(zip(*(frame[column].astype(object).where(frame[column].notna(), None).tolist() for column in frame)))
+
+
+def write_report(target, frame, day_sets=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Write the Recap and Summary sheets of a recap to ``target`` (a path or binary file).
+
+    ``frame`` is a recap table; with ``day_sets`` it is a compact
+    :func:`rekap.engine.recap_table` summary whose date lists are rendered
+    ``chunk_rows`` employees at a time. Rows are coloured by their
+    Performance band like :func:`rekap.performance.highlight_performance`.
+    """
+    book = Workbook(write_only=True)
+    _add_styles(book)
+
+    sheet, jumlah = None, 0
+    for start in range(0, max(len(frame), 1), chunk_rows):
+        chunk = frame.iloc[start:start + chunk_rows]
+        if day_sets is not None:
+            chunk = add_dates(chunk, day_sets)
+        chunk = chunk[[column for column in chunk.columns if column not in STYLE_COLUMNS]]
+        rows = _records(chunk)
+        if sheet is None:
+            sheet = _start_sheet(book, "Recap", list(chunk.columns), rows)
+        for row in rows:
+            sheet.append(row)
+        jumlah += len(rows)
+
+    if jumlah:
+        performance = get_column_letter(chunk.columns.get_loc("Performance") + 1)
+        table = f"A2:{get_column_letter(len(chunk.columns))}{jumlah + 1}"
+        for band in PERFORMANCE_COLORS:
+            rule = FormulaRule(formula=[f'${performance}2="{band}"'], fill=_band_fill(band))
+            sheet.conditional_formatting.add(table, rule)
+
+    metrics = summary_metrics(frame)
+    bands = frame['Performance'].value_counts().reindex(PERFORMANCE_BANDS, fill_value=0)
+    summary = _start_sheet(book, "Summary", list(metrics.columns), _records(metrics))
+    for row in _records(metrics):
+        summary.append(_row(summary, row))
+    summary.append([])
+    summary.append(_row(summary, ["Performance", "Employees"], HEADER_STYLE))
+    for band, count in bands.items():
+        summary.append(_row(summary, [band, int(count)], band_style(band) if band in PERFORMANCE_COLORS else None))
+
+    book.save(target)
+    return target
+
+
+def report_xlsx(frame, day_sets=None):
+    """:func:`write_report` as bytes, e.g. for a download button"""
+    buffer = io.BytesIO()
+    write_report(buffer, frame, day_sets)
+    return buffer.getvalue()
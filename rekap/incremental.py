@@ -0,0 +1,188 @@
+"""Incremental recap: re-upload a workbook and only redo the cells that changed.
+
+The state of a run keeps, per employee (name and role) and date column, a hash
+of the raw cell, its parsed punches and its classification. On the next upload
+the cells are hashed again; only new or edited cells are parsed, and only the
+day columns that contain one are classified again. Overnight (ASRAMA/MUSYRIF)
+shifts also depend on the next day's punches, so a changed or newly appended
+column re-evaluates the day before it as well.
+"""
+
+import pickle
+from collections import Counter
+from typing import NamedTuple
+
+import numpy as np
+from pandas.util import hash_array
+
+from rekap.classify import AttendanceMasks
+from rekap.engine import (
+    OVERNIGHT_ROLES,
+    classify_attendance,
+    debug_records,
+    recap_frame,
+    recap_table,
+    role_thresholds,
+    sheet_dates,
+    sheet_employees,
+)
+from rekap.parsing import NO_PUNCH, PunchGrid, parse_grid
+from rekap.profiling import NULL_TIMER
+from rekap.settings import normalize_role
+
+
+class RecapState(NamedTuple):
+    """Per-employee, per-day results of one run, reused by the next one"""
+    employees: list  # ((name, role), occurrence) key of each row
+    columns: list  # (date, occurrence) key of each day column, None when undated
+    hashes: np.ndarray  # uint64, hash of each raw cell
+    grid: PunchGrid
+    masks: AttendanceMasks
+    catat_debug: np.ndarray  # bool, cells listed in the debug table
+    thresholds: dict  # role_thresholds() the masks were classified with
+
+
+def _keys(values):
+    """Number repeated values so every key is unique: (value, occurrence)"""
+    seen = Counter()
+    keys = []
+    for value in values:
+        keys.append((value, seen[value]))
+        seen[value] += 1
+    return keys
+
+
+def cell_hashes(data_absensi):
+    """Hash of every raw cell, cheap enough to run on each upload"""
+    values = np.asarray(data_absensi, dtype=object)
+    return hash_array(values.ravel(), categorize=False).reshape(values.shape)
+
+
+def _match(keys, old_keys):
+    """Index of each key in ``old_keys``, or -1 when it is new"""
+    posisi = {key: i for i, key in enumerate(old_keys) if key is not None}
+    return np.array([posisi.get(key, -1) for key in keys], dtype=np.intp)
+
+
+def _stable_cells(state, hashes, baris_lama, kolom_lama, overnight):
+    """Cells whose stored parse and classification are still valid"""
+    jumlah_hari = hashes.shape[1]
+    sama = np.zeros(hashes.shape, dtype=bool)
+    rows = np.flatnonzero(baris_lama >= 0)
+    cols = np.flatnonzero(kolom_lama >= 0)
+    if len(rows) and len(cols):
+        sama[np.ix_(rows, cols)] = hashes[np.ix_(rows, cols)] == state.hashes[np.ix_(baris_lama[rows], kolom_lama[cols])]
+
+    # An overnight shift also needs tomorrow's cell, and the same day to be tomorrow
+    besok_sama = np.zeros(hashes.shape, dtype=bool)
+    besok_sama[:, :-1] = sama[:, 1:] & ((kolom_lama[1:] == kolom_lama[:-1] + 1) & (kolom_lama[:-1] >= 0))[None, :]
+    if jumlah_hari:
+        besok_sama[:, -1] = kolom_lama[-1] == len(state.columns) - 1
+
+    return sama, sama & (besok_sama | ~overnight[:, None])
+
+
+def update_recap(frame, settings, period, state=None, debug_info=None, progress=None, timer=NULL_TIMER,
+                 compact=False):
+    """Like :func:`rekap.engine.compute_recap`, reusing the ``state`` of a previous run.
+
+    Returns the recap table and the new state; pass ``state=None`` for a full run.
+    With ``compact`` the table is the (summary, DaySets) pair of
+    :func:`rekap.engine.recap_table`.
+    """
+    with timer.stage("header") as stage:
+        tanggal_final = sheet_dates(frame, period)
+        stage["rows"] = len(tanggal_final)
+
+    nama_guru, role_guru, data_absensi = sheet_employees(frame, len(tanggal_final))
+    roles = [normalize_role(role, settings) for role in role_guru]
+    overnight = np.array([role in OVERNIGHT_ROLES for role in roles], dtype=bool)
+    hari_kerja = np.array([tgl is not None for tgl in tanggal_final], dtype=bool)
+    thresholds = role_thresholds(settings)
+
+    employees = _keys(zip(nama_guru, roles))
+    columns = [key if key[0] is not None else None for key in _keys(tanggal_final)]
+    shape = data_absensi.shape
+
+    with timer.stage("diff") as stage:
+        hashes = cell_hashes(data_absensi)
+        grid = PunchGrid(
+            np.zeros(shape, dtype=bool), np.zeros(shape, dtype=np.int16),
+            np.full(shape, NO_PUNCH, dtype=np.int16), np.full(shape, NO_PUNCH, dtype=np.int16)
+        )
+        masks = AttendanceMasks.empty(shape)
+        catat_debug = np.zeros(shape, dtype=bool)
+
+        if state is None:
+            sama = stabil = np.zeros(shape, dtype=bool)
+        else:
+            baris_lama = _match(employees, state.employees)
+            kolom_lama = _match(columns, state.columns)
+            sama, stabil = _stable_cells(state, hashes, baris_lama, kolom_lama, overnight)
+            if thresholds != state.thresholds:
+                stabil = np.zeros(shape, dtype=bool)
+
+            rows, cols = np.nonzero(sama)
+            lama = (baris_lama[rows], kolom_lama[cols])
+            for values, old_values in zip(grid, state.grid):
+                values[rows, cols] = old_values[lama]
+
+            rows, cols = np.nonzero(stabil)
+            lama = (baris_lama[rows], kolom_lama[cols])
+            for mask, old_mask in zip(masks, state.masks):
+                mask[rows, cols] = old_mask[lama]
+            catat_debug[rows, cols] = state.catat_debug[lama]
+        stage["rows"] = int((~sama).sum())
+
+    with timer.stage("cells") as stage:
+        # Only new or edited cells are parsed
+        baru = ~sama
+        parsed = parse_grid(data_absensi[baru][:, None])
+        for values, new_values in zip(grid, parsed):
+            values[baru] = new_values[:, 0]
+        stage["rows"] = int(baru.sum())
+        if progress is not None and len(nama_guru):
+            progress(len(nama_guru), len(nama_guru))
+
+    with timer.stage("classify") as stage:
+        # Day columns with any unstable cell, plus the following day they look at
+        ulang = np.flatnonzero((~stabil).any(axis=0))
+        pilih = np.union1d(ulang, ulang[ulang + 1 < shape[1]] + 1)
+        if len(ulang):
+            sub_grid = PunchGrid(*(values[:, pilih] for values in grid))
+            sub_masks, sub_debug = classify_attendance(sub_grid, roles, hari_kerja[pilih], settings)
+            posisi = np.searchsorted(pilih, ulang)
+            for mask, sub_mask in zip(masks, sub_masks):
+                mask[:, ulang] = sub_mask[:, posisi]
+            catat_debug[:, ulang] = sub_debug[:, posisi]
+        stage["rows"] = len(ulang)
+
+    if debug_info is not None:
+        with timer.stage("debug") as stage:
+            records = debug_records(catat_debug, grid, data_absensi, nama_guru, roles, overnight, tanggal_final)
+            debug_info.extend(records)
+            stage["rows"] = len(records)
+
+    with timer.stage("build", rows=len(nama_guru)):
+        if compact:
+            df_hasil = recap_table(nama_guru, roles, masks, tanggal_final)
+        else:
+            df_hasil = recap_frame(nama_guru, roles, masks, tanggal_final, progress)
+
+    return df_hasil, RecapState(employees, columns, hashes, grid, masks, catat_debug, thresholds)
+
+
+def save_state(state, path):
+    """Write a RecapState to disk for the next run"""
+    with open(path, "wb") as handle:
+        pickle.dump(state, handle, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_state(path):
+    """Read a RecapState written by :func:`save_state`; None when missing or unreadable"""
+    try:
+        with open(path, "rb") as handle:
+            state = pickle.load(handle)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError):
+        return None
+    return state if isinstance(state, RecapState) else None
@@ -0,0 +1,244 @@
+"""Parsing of the attendance sheet: date header and punch-time cells."""
+
+from datetime import datetime
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+# One punch entry per line of a cell: HH:MM with ':' or '.' separators,
+# anything after the minutes (seconds) is ignored and surrounding whitespace is
+# stripped. Mirrors the checks done by parse_jam.
+_JAM_PATTERN = r"(?m)^[^\S\n]*(\d+)[:.](\d+)(?:[:.][^\n]*|[^\S\n]*)$"
+
+# "HH:MM" text for every minute of the day, indexed by hours * 60 + minutes
+_JAM_TEXT = np.array([f"{h:02d}:{m:02d}" for h in range(24) for m in range(60)], dtype=object)
+
+# Longer digit runs cannot fit in int64 and are out of range anyway
+_MAX_DIGITS = 18
+
+# Marker for "no punch" in minute arrays
+NO_PUNCH = -1
+
+
+def parse_tanggal_header(tanggal_header, period):
+    """Turn the day numbers of the header row into dates, rolling over to the end month"""
+    tanggal_final = []
+    current_bulan = period.bulan_awal
+
+    for i, val in enumerate(tanggal_header):
+        try:
+            tgl = int(val)
+            if i > 0 and int(tanggal_header[i]) < int(tanggal_header[i-1]):
+                current_bulan = period.bulan_akhir
+            tanggal_final.append(datetime(period.tahun, current_bulan, tgl))
+        except:
+            tanggal_final.append(None)
+    return tanggal_final
+
+
+def parse_jam(cell):
+    """Parse time entries from cell data"""
+    if pd.isna(cell): 
+        return []
+    
+    cell = str(cell).strip().lower()
+    
+    # If cell is empty after stripping
+    if not cell:
+        return []
+    
+    # Check for holiday marker
+    if 'l' in cell: 
+        return ['L']
+    
+    # Split by newlines and filter only valid time entries
+    jam_entries = cell.split('\n')
+    valid_times = []
+    
+    for entry in jam_entries:
+        entry = entry.strip()
+        
+        # Check for time format with colon (:) or dot (.)
+        if (':' in entry or '.' in entry):
+            # Replace dots with colons for standardization
+            normalized_entry = entry.replace('.', ':')
+            time_parts = normalized_entry.split(':')
+            
+            # Support HH:MM or HH:MM:SS format
+            if len(time_parts) >= 2:
+                try:
+                    hours = time_parts[0]
+                    minutes = time_parts[1]
+                    
+                    # Validate if hours and minutes are digits
+                    if hours.isdigit() and minutes.isdigit():
+                        hour_int = int(hours)
+                        minute_int = int(minutes)
+                        
+                        # Validate time range
+                        if 0 <= hour_int <= 23 and 0 <= minute_int <= 59:
+                            # Format to HH:MM (ignore seconds if present)
+                            formatted_time = f"{hour_int:02d}:{minute_int:02d}"
+                            valid_times.append(formatted_time)
+                except:
+                    continue
+    
+    return valid_times
+
+
+def valid_jam_smpsmk(jam_list):
+    """Extract valid check-in and check-out times for SMPSMK role"""
+    masuk = None
+    pulang = None
+    for jam in jam_list:
+        if jam >= "00:00" and masuk is None:
+            masuk = jam
+        pulang = jam  # Take the last time as check-out
+    return masuk, pulang
+
+
+def jam_ke_menit(jam):
+    """Convert an "HH:MM" (or "H.MM", "HH:MM:SS") time to minutes since midnight"""
+    jam_list = parse_jam(jam)
+    if len(jam_list) != 1 or jam_list == ['L']:
+        raise ValueError(f"Invalid time {jam!r}, expected HH:MM")
+    hours, minutes = jam_list[0].split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+def menit_ke_jam(menit):
+    """Format minutes since midnight as HH:MM text"""
+    return _JAM_TEXT[menit]
+
+
+class PunchGrid(NamedTuple):
+    """Parsed punches of an employees x days block of the attendance sheet"""
+    holiday: np.ndarray  # bool, cell carries the 'L' holiday marker
+    count: np.ndarray  # int16, number of valid punch times in the cell
+    first: np.ndarray  # int16, first punch in minutes since midnight or NO_PUNCH
+    last: np.ndarray  # int16, last punch in minutes since midnight or NO_PUNCH
+
+
+def _to_int(digits):
+    """Convert captured digit strings to ints, mapping oversized runs to -1"""
+    result = pd.Series(-1, index=digits.index, dtype="int64")
+    fits = digits.str.lstrip("0").str.len() <= _MAX_DIGITS
+    result[fits] = digits[fits].astype(object).astype("int64")
+    return result
+
+
+def _parse_cells(flat):
+    """Holiday flags and valid punch minutes of a flat Series of cells.
+
+    The minutes are indexed by flat cell position, in punch order within a cell.
+    """
+    holiday = np.zeros(flat.size, dtype=bool)
+
+    # Object dtype keeps Python's str.strip/str.lower rules, same as parse_jam
+    cells = flat[flat.notna()].astype(str).astype(object).str.strip().str.lower()
+    cells = cells[cells.str.len() > 0]
+
+    is_holiday = cells.str.contains("l", regex=False)
+    holiday[cells.index[is_holiday]] = True
+
+    # One row per punch of every non-holiday cell, indexed by flat cell position
+    matches = cells[~is_holiday].str.findall(_JAM_PATTERN).explode().dropna()
+    if not len(matches):
+        return holiday, pd.Series([], index=pd.Index([], dtype="int64"), dtype="int64")
+
+    parts = pd.DataFrame(matches.tolist(), index=matches.index)
+    hours = _to_int(parts[0])
+    minutes = _to_int(parts[1])
+    valid = hours.between(0, 23) & minutes.between(0, 59)
+    return holiday, (hours * 60 + minutes)[valid]
+
+
+def _factorize_cells(values):
+    """Code of every cell of a block into its distinct texts, and those texts.
+
+    Attendance sheets repeat the same few thousand punch texts, so only the
+    distinct ones are parsed. A cell parses like ``str(cell)`` (see
+    parse_jam), hence the texts are factorized rather than the raw values,
+    where 7 and 7.0 would count as one. Empty cells get code -1.
+    """
+    flat = pd.Series(values.ravel(), dtype=object)
+    ada = flat.notna().to_numpy()
+    codes = np.full(flat.size, -1, dtype=np.intp)
+    kode, teks = pd.factorize(flat[ada].astype(str))
+    codes[ada] = kode
+    return codes, pd.Series(np.asarray(teks, dtype=object), dtype=object)
+
+
+def parse_grid(block):
+    """Parse a whole block of punch cells at once, with the semantics of parse_jam"""
+    values = np.asarray(block, dtype=object)
+    shape = values.shape
+    codes, teks = _factorize_cells(values)
+    holiday, menit = _parse_cells(teks)
+
+    # One slot per distinct text plus a last, empty one that code -1 (empty cells) picks
+    holiday = np.append(holiday, False)
+    count = np.zeros(holiday.size, dtype=np.int16)
+    first = np.full(holiday.size, NO_PUNCH, dtype=np.int16)
+    last = np.full(holiday.size, NO_PUNCH, dtype=np.int16)
+
+    if len(menit):
+        ringkas = menit.groupby(level=0, sort=False).agg(["size", "first", "last"])
+        count[ringkas.index] = ringkas["size"].to_numpy()
+        first[ringkas.index] = ringkas["first"].to_numpy()
+        last[ringkas.index] = ringkas["last"].to_numpy()
+
+    return PunchGrid(
+        holiday[codes].reshape(shape), count[codes].reshape(shape),
+        first[codes].reshape(shape), last[codes].reshape(shape)
+    )
+
+
+def punch_events(block):
+    """Every valid punch of a block as long-format rows, plus the holiday flags.
+
+    Returns the employees x days holiday matrix and a frame with one row per
+    punch: ``row``, ``col``, ``seq`` (order within the cell) and ``menit``.
+    """
+    values = np.asarray(block, dtype=object)
+    shape = values.shape
+    codes, teks = _factorize_cells(values)
+    holiday, menit = _parse_cells(teks)
+
+    # Punches of each distinct text are contiguous in ``menit``; repeat them for every cell with that text
+    jumlah = np.bincount(menit.index.to_numpy(dtype=np.intp), minlength=len(teks) + 1)
+    awal = np.cumsum(jumlah) - jumlah
+    per_sel = jumlah[codes]
+    posisi = np.repeat(np.arange(codes.size), per_sel)
+    seq = np.arange(posisi.size) - np.repeat(np.cumsum(per_sel) - per_sel, per_sel)
+
+    jumlah_kolom = max(shape[1], 1)
+    events = pd.DataFrame({
+        "row": (posisi // jumlah_kolom).astype(np.int32),
+        "col": (posisi % jumlah_kolom).astype(np.int16),
+        "seq": seq.astype(np.int16),
+        "menit": menit.to_numpy(dtype=np.int16)[awal[codes[posisi]] + seq],
+    })
+    return np.append(holiday, False)[codes].reshape(shape), events
+
+
+def grid_from_events(holiday, events):
+    """Rebuild the PunchGrid of a block from :func:`punch_events` output"""
+    shape = holiday.shape
+    posisi = events["row"].to_numpy(dtype=np.intp) * shape[1] + events["col"].to_numpy(dtype=np.intp)
+    seq = events["seq"].to_numpy()
+    menit = events["menit"].to_numpy(dtype=np.int16)
+
+    count = np.bincount(posisi, minlength=holiday.size).astype(np.int16)
+    first = np.full(holiday.size, NO_PUNCH, dtype=np.int16)
+    last = np.full(holiday.size, NO_PUNCH, dtype=np.int16)
+    awal = seq == 0
+    first[posisi[awal]] = menit[awal]
+    akhir = seq == count[posisi] - 1
+    last[posisi[akhir]] = menit[akhir]
+
+    return PunchGrid(
+        np.asarray(holiday, dtype=bool), count.reshape(shape),
+        first.reshape(shape), last.reshape(shape)
+    )
@@ -0,0 +1,78 @@
+"""Performance rating derived from attendance issue counts."""
+
+import numpy as np
+import pandas as pd
+
+# Background colour and legend icon of each performance band
+PERFORMANCE_COLORS = {
+    "Excellent": "#d4edda",
+    "Good": "#d1ecf1",
+    "Needs Attention": "#fff3cd",
+    "Poor": "#f8d7da",
+}
+PERFORMANCE_ICONS = {"Excellent": "🟢", "Good": "🔵", "Needs Attention": "🟡", "Poor": "🔴"}
+
+# Bands of get_performance_badge, as categories of the recap's Performance and Badge_Class columns
+PERFORMANCE_BANDS = ["Excellent", "Good", "Needs Attention", "Poor", "No Data"]
+BADGE_CLASSES = ["status-excellent", "status-good", "status-warning", "status-danger"]
+
+
+def get_performance_badge(issues_count, total_days):
+    """Generate performance badge based on attendance issues"""
+    if total_days == 0:
+        return "status-warning", "No Data"
+    
+    issue_rate = issues_count / total_days
+    if issue_rate == 0:
+        return "status-excellent", "Excellent"
+    elif issue_rate <= 0.1:
+        return "status-good", "Good"
+    elif issue_rate <= 0.3:
+        return "status-warning", "Needs Attention"
+    else:
+        return "status-danger", "Poor"
+
+
+def performance_bands(issues_count, total_days):
+    """:func:`get_performance_badge` of many employees at once, as (Badge_Class, Performance) categoricals"""
+    issues = np.asarray(issues_count, dtype=float)
+    days = np.broadcast_to(np.asarray(total_days, dtype=float), issues.shape)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        issue_rate = issues / days
+    band = np.select([days == 0, issue_rate == 0, issue_rate <= 0.1, issue_rate <= 0.3], [4, 0, 1, 2], default=3)
+    badge = np.array([0, 1, 2, 3, 2])[band]
+    return pd.Categorical.from_codes(badge, BADGE_CLASSES), pd.Categorical.from_codes(band, PERFORMANCE_BANDS)
+
+
+def highlight_performance(row):
+    """Row style for pandas' Styler: background colour of the performance band"""
+    if row['Performance'] == 'Excellent':
+        return ['background-color: #d4edda'] * len(row)
+    elif row['Performance'] == 'Good':
+        return ['background-color: #d1ecf1'] * len(row)
+    elif row['Performance'] == 'Needs Attention':
+        return ['background-color: #fff3cd'] * len(row)
+    elif row['Performance'] == 'Poor':
+        return ['background-color: #f8d7da'] * len(row)
+    else:
+        return [''] * len(row)
+
+
+def performance_css(performance):
+    """Row CSS of every performance value at once, aligned with the given Series"""
+    return ("background-color: " + performance.map(PERFORMANCE_COLORS)).fillna("")
+
+
+def style_performance(frame, row_css):
+    """Styler colouring each row of ``frame`` with its precomputed CSS from :func:`performance_css`"""
+    css = row_css.reindex(frame.index).to_numpy(dtype=object)
+    styles = pd.DataFrame(
+        np.repeat(css[:, None], frame.shape[1], axis=1), index=frame.index, columns=frame.columns
+    )
+    return frame.style.apply(lambda _: styles, axis=None)
+
+
+def performance_labels(performance):
+    """Performance values prefixed with their legend icon, for tables too large to style"""
+    performance = performance.astype(str)
+    return (performance.map(PERFORMANCE_ICONS) + " " + performance).fillna(performance)
@@ -0,0 +1,74 @@
+"""Named stage timers for the recap hot path."""
+
+import io
+import json
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+
+class StageTimer:
+    """Collects wall time, row counts and (optionally) peak memory of named stages.
+
+    Each ``with timer.stage(name) as record:`` block appends one record; the
+    block may set ``record["rows"]``. With ``trace_memory`` the peak traced
+    allocation of every stage is recorded as well, at the cost of slower runs.
+    Records replayed from a cache are flagged ``cached`` and left out of the
+    total.
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.started_at = time.time()
+        self.records = []
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        record = {"stage": name, "seconds": None, "rows": rows, "peak_mb": None, "cached": False}
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            mulai_memori = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = time.perf_counter() - start
+            if self.trace_memory:
+                record["peak_mb"] = (tracemalloc.get_traced_memory()[1] - mulai_memori) / (1024 * 1024)
+            self.records.append(record)
+
+    def extend(self, records, **extra):
+        """Add records measured elsewhere (e.g. replayed from a cache)"""
+        self.records.extend(dict(record, **extra) for record in records)
+
+    def total_seconds(self):
+        """Wall time of the stages that actually ran in this run"""
+        return sum(record["seconds"] for record in self.records if not record["cached"])
+
+    def to_json(self):
+        return json.dumps({"total_seconds": self.total_seconds(), "stages": self.records}, indent=2)
+
+    def close(self):
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+class _NullTimer:
+    """Stand-in used when no timer is passed; costs one nullcontext per stage"""
+
+    def stage(self, name, rows=None):
+        return nullcontext({})
+
+
+NULL_TIMER = _NullTimer()
+
+
+def format_profile(profiler, limit=30, sort="cumulative"):
+    """Top functions of a finished ``cProfile.Profile`` as text"""
+    buffer = io.StringIO()
+    pstats.Stats(profiler, stream=buffer).sort_stats(sort).print_stats(limit)
+    return buffer.getvalue()
@@ -0,0 +1,97 @@
+"""Rate-limited progress reporting shared by the app and headless runs.
+
+The engine reports progress as ``progress(done, total)`` calls, in employee
+rows. :class:`ProgressReporter` is such a callable that forwards at most one
+:class:`ProgressUpdate` (with rows/s and ETA) per ``interval`` seconds and per
+``min_step`` of the total to a sink: a Streamlit progress bar, a log stream,
+or anything else, so reporting never costs more than a handful of UI updates.
+"""
+
+import sys
+import time
+from typing import NamedTuple
+
+
+class ProgressUpdate(NamedTuple):
+    """One forwarded progress report"""
+    done: int
+    total: int  # None when the number of rows is not known up front
+    elapsed: float  # seconds since the reporter started
+    rate: float  # rows per second so far
+    eta: float  # seconds left, None when unknown
+
+    @property
+    def fraction(self):
+        return min(self.done / self.total, 1.0) if self.total else 0.0
+
+
+def format_progress(update):
+    """One-line text of an update, e.g. "1,200/4,000 rows · 8,512 rows/s · ETA 0.3s" """
+    text = f"{update.done:,}/{update.total:,} rows" if update.total else f"{update.done:,} rows"
+    text += f" · {update.rate:,.0f} rows/s"
+    if update.eta is not None:
+        text += f" · ETA {update.eta:.1f}s"
+    return text
+
+
+def log_sink(label="", stream=None):
+    """Sink that writes every forwarded update as a line, for headless runs"""
+    prefix = f"{label}: " if label else ""
+
+    def write(update):
+        print(prefix + format_progress(update), file=stream or sys.stderr, flush=True)
+    return write
+
+
+class ProgressReporter:
+    """``progress(done, total)`` callable that throttles updates before passing them to ``sink``.
+
+    Timing starts when the reporter is created (or at ``start``, a ``clock``
+    reading). Updates are forwarded when at least ``interval`` seconds passed
+    since the last one and they moved at least ``min_step`` of the total;
+    completion (``done == total``) is always forwarded, repeats never. The
+    owner calls :meth:`finish` when the work is done, so the final count is
+    sent even when it was throttled or the total was never known.
+    """
+
+    def __init__(self, sink, interval=0.25, min_step=0.05, clock=time.perf_counter, start=None):
+        self.sink = sink
+        self.interval = interval
+        self.min_step = min_step
+        self.clock = clock
+        self.started_at = clock() if start is None else start
+        self.last = None  # last forwarded ProgressUpdate
+        self.latest = None  # (done, total) of the last call, forwarded or not
+        self.calls = 0
+
+    def __call__(self, done, total=None):
+        self.calls += 1
+        self.latest = (done, total)
+        elapsed = self.clock() - self.started_at
+
+        if self.last is not None:
+            if (done, total) == (self.last.done, self.last.total):
+                return
+            if done != total and elapsed - self.last.elapsed < self.interval:
+                return
+            if done != total and total and (done - self.last.done) / total < self.min_step:
+                return
+        self._send(done, total, elapsed)
+
+    def finish(self, done=None):
+        """Forward the final count (``done``, default the last one reported), unless it was already sent.
+
+        When no total was known the final count becomes the total.
+        """
+        if done is None:
+            done = self.latest[0] if self.latest is not None else 0
+        total = self.latest[1] if self.latest is not None and self.latest[1] is not None else done
+        if self.last is None or (done, total) != (self.last.done, self.last.total):
+            self._send(done, total, self.clock() - self.started_at)
+        return self.last
+
+    def _send(self, done, total, elapsed):
+        rate = done / elapsed if elapsed > 0 else 0.0
+        eta = (total - done) / rate if total and rate > 0 else None
+        self.last = ProgressUpdate(done, total, elapsed, rate, eta)
+        self.sink(self.last)
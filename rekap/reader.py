@@ -0,0 +1,120 @@
+"""Excel readers producing the raw sheet frame expected by compute_recap.
+
+Every backend returns what ``pd.read_excel(source, header=None)`` would: one
+row per sheet row, one column per sheet column, empty cells as missing values.
+
+* ``openpyxl``: plain ``pd.read_excel``, the reference behaviour.
+* ``calamine``: ``pd.read_excel(engine="calamine")``, much faster; needs the
+  optional ``python-calamine`` package.
+* ``openpyxl-readonly``: streams rows with openpyxl in read-only, values-only
+  mode, skips the rows above the date header and builds the frame directly.
+"""
+
+import importlib.util
+import zipfile
+
+import numpy as np
+import pandas as pd
+from openpyxl.cell.cell import ERROR_CODES
+
+from rekap.engine import HEADER_ROW
+
+# Text pandas reads as missing by default, so values-only rows match read_excel
+_NA_TEXT = {
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a",
+    "nan", "null",
+}
+
+
+def _convert_value(value):
+    """Normalise one values-only cell the way pandas' openpyxl reader does"""
+    if value is None:
+        return np.nan
+    if isinstance(value, str):
+        return np.nan if value in _NA_TEXT or value in ERROR_CODES else value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _read_openpyxl(source, sheet_name):
+    return pd.read_excel(source, header=None, sheet_name=sheet_name, engine="openpyxl")
+
+
+def _read_calamine(source, sheet_name):
+    return pd.read_excel(source, header=None, sheet_name=sheet_name, engine="calamine")
+
+
+def iter_sheet_rows(source, sheet_name=0, min_row=1):
+    """Stream the rows of one sheet as lists of cell values, without loading the sheet.
+
+    Values are normalised like ``pd.read_excel`` does (missing cells as NaN,
+    whole floats as ints) and trailing empty cells are dropped.
+    """
+    from openpyxl import load_workbook
+
+    book = load_workbook(source, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet = book.worksheets[sheet_name] if isinstance(sheet_name, int) else book[sheet_name]
+        sheet.reset_dimensions()
+
+        for row in sheet.iter_rows(min_row=min_row, values_only=True):
+            row = [_convert_value(value) for value in row]
+            while row and row[-1] is np.nan:
+                row.pop()
+            yield row
+    finally:
+        book.close()
+
+
+def _read_openpyxl_readonly(source, sheet_name):
+    # Rows above the date header are never used; keep them as blank rows
+    rows = [[] for _ in range(HEADER_ROW)]
+    rows.extend(iter_sheet_rows(source, sheet_name, min_row=HEADER_ROW + 1))
+
+    while rows and not rows[-1]:
+        rows.pop()
+    if not rows:
+        return pd.DataFrame()
+
+    width = max(len(row) for row in rows)
+    return pd.DataFrame([row + [np.nan] * (width - len(row)) for row in rows], dtype=object)
+
+
+READERS = {
+    "openpyxl": _read_openpyxl,
+    "calamine": _read_calamine,
+    "openpyxl-readonly": _read_openpyxl_readonly,
+}
+
+
+def available_readers():
+    """Reader backends usable in this environment"""
+    if importlib.util.find_spec("python_calamine") is None:
+        return [name for name in READERS if name != "calamine"]
+    return list(READERS)
+
+
+def sheet_names(source):
+    """Names of the worksheets of a workbook in order, from its workbook part only (chart sheets left out)"""
+    from openpyxl.reader.workbook import WorkbookParser
+
+    with zipfile.ZipFile(source) as archive:
+        parser = WorkbookParser(archive, "xl/workbook.xml")
+        parser.parse()
+        return [sheet.name for sheet, rel in parser.find_sheets() if rel.Type.endswith("/worksheet")]
+
+
+def read_workbook(source, engine="auto", sheet_name=0):
+    """Read one attendance sheet as a raw ``header=None`` frame.
+
+    ``engine="auto"`` picks calamine when installed and falls back to the
+    streaming read-only openpyxl reader.
+    """
+    if engine == "auto":
+        engine = "calamine" if "calamine" in available_readers() else "openpyxl-readonly"
+    if engine not in READERS:
+        raise ValueError(f"Unknown reader {engine!r}, expected one of {', '.join(READERS)}")
+    return READERS[engine](source, sheet_name)
+
@@ -0,0 +1,147 @@
+"""Multi-month and year-to-date reports over the punch store.
+
+Every stored sheet is summarised into per-employee, per-month issue counts
+(``<store>/months.parquet``). Rolling 3/6/12-month and year-to-date reports
+only read and sum that index; source workbooks are never opened again. The
+counts depend on the schedule settings, so each sheet's rows remember the
+settings they were classified with and are rebuilt from the stored punches
+when the settings (or the sheet) change.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from rekap.classify import AttendanceMasks
+from rekap.engine import COUNT_COLUMNS, classify_attendance
+from rekap.performance import get_performance_badge
+from rekap.settings import normalize_role
+from rekap.store import latest_entries, load_sheet, read_index, sheet_grid
+
+MONTH_COLUMNS = ["period_id", "saved_at", "settings_key", "nama", "role", "bulan", "hari_kerja", *COUNT_COLUMNS]
+
+REPORT_WINDOWS = {"3 months": 3, "6 months": 6, "12 months": 12, "Year to date": "ytd"}
+
+
+def settings_key(settings):
+    """Text fingerprint of the schedule settings the counts depend on"""
+    return ";".join(
+        f"{role}={jadwal['jam_masuk']}-{jadwal['jam_pulang']}" for role, jadwal in sorted(settings.items())
+    )
+
+
+def monthly_counts(nama_guru, roles, masks, tanggal_final):
+    """Issue counts and working days of every employee in every calendar month of a sheet"""
+    dated = np.array([tgl is not None for tgl in tanggal_final], dtype=bool)
+    bulan = pd.DatetimeIndex([tgl for tgl in tanggal_final if tgl is not None]).to_period("M")
+    if not len(bulan) or not len(nama_guru):
+        return pd.DataFrame(columns=["nama", "role", "bulan", "hari_kerja", *COUNT_COLUMNS])
+
+    # Days x months one-hot matrix: one matrix product sums every mask per month
+    kode, daftar_bulan = pd.factorize(bulan, sort=True)
+    per_bulan = np.zeros((len(kode), len(daftar_bulan)), dtype=np.int32)
+    per_bulan[np.arange(len(kode)), kode] = 1
+
+    counts = {
+        kategori: (mask[:, dated].astype(np.int32) @ per_bulan).ravel()
+        for kategori, mask in zip(AttendanceMasks._fields, masks)
+    }
+    jumlah = len(nama_guru)
+    return pd.DataFrame({
+        "nama": np.repeat(np.asarray(nama_guru, dtype=object), len(daftar_bulan)),
+        "role": np.repeat(np.asarray(roles, dtype=object), len(daftar_bulan)),
+        "bulan": np.tile(daftar_bulan.to_timestamp().to_numpy(), jumlah),
+        "hari_kerja": np.tile(per_bulan.sum(axis=0), jumlah),
+        **counts,
+    })
+
+
+def sheet_months(store_dir, pid, settings):
+    """Monthly counts of one stored sheet, classified from its stored punches"""
+    sheet = load_sheet(store_dir, pid, columns=["employee", "day", "seq", "menit", "holiday"])
+    nama_guru, role_guru, tanggal_final, grid = sheet_grid(sheet)
+    roles = [normalize_role(role, settings) for role in role_guru]
+    hari_kerja = np.array([tgl is not None for tgl in tanggal_final], dtype=bool)
+    masks, _ = classify_attendance(grid, roles, hari_kerja, settings)
+    return monthly_counts(nama_guru, roles, masks, tanggal_final)
+
+
+def read_months(store_dir, start=None, end=None):
+    """Rows of the monthly index between two months (inclusive)"""
+    path = os.path.join(store_dir, "months.parquet")
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=MONTH_COLUMNS)
+    filters = []
+    if start is not None:
+        filters.append(("bulan", ">=", pd.Timestamp(start)))
+    if end is not None:
+        filters.append(("bulan", "<=", pd.Timestamp(end)))
+    return pd.read_parquet(path, filters=filters or None)
+
+
+def index_months(store_dir, settings):
+    """Bring the monthly index up to date for ``settings``; returns how many sheets were (re)indexed.
+
+    Sheets that were stored again, or indexed with other settings, are
+    recomputed from their stored punches. A sheet stored under several
+    periods is counted once, with the period saved last (see
+    :func:`rekap.store.latest_entries`).
+    """
+    index = latest_entries(read_index(store_dir))
+    months = read_months(store_dir)
+    key = settings_key(settings)
+
+    terindeks = months[months["settings_key"] == key].drop_duplicates("period_id")
+    terindeks = dict(zip(terindeks["period_id"], terindeks["saved_at"]))
+    basi = [
+        (pid, saved_at) for pid, saved_at in zip(index["period_id"], index["saved_at"])
+        if terindeks.get(pid) != saved_at
+    ]
+    dihapus = set(months["period_id"]) - set(index["period_id"])
+    if not basi and not dihapus:
+        return 0
+
+    baru = [
+        sheet_months(store_dir, pid, settings).assign(period_id=pid, saved_at=saved_at, settings_key=key)
+        for pid, saved_at in basi
+    ]
+    buang = {pid for pid, _ in basi} | dihapus
+    frames = [df for df in [months[~months["period_id"].isin(buang)], *baru] if len(df)]
+    months = pd.concat(frames, ignore_index=True)[MONTH_COLUMNS] if frames else pd.DataFrame(columns=MONTH_COLUMNS)
+
+    path = os.path.join(store_dir, "months.parquet")
+    months.to_parquet(path + ".tmp", index=False)
+    os.replace(path + ".tmp", path)
+    return len(basi)
+
+
+def report_window(end, months):
+    """First and last month of a report ending at ``end``; ``months`` is a count or "ytd"."""
+    end = pd.Timestamp(end).to_period("M")
+    start = pd.Period(year=end.year, month=1, freq="M") if months == "ytd" else end - (months - 1)
+    return start.to_timestamp(), end.to_timestamp()
+
+
+def multi_month_report(store_dir, settings, end, months=12):
+    """Per-employee totals over the months ending at ``end`` (a count of months or "ytd").
+
+    Employees are matched by name and role across all stored sheets, so one
+    person's months from different workbooks add up, and so do two people of
+    the same name and role from different workbooks.
+    """
+    index_months(store_dir, settings)
+    start, end = report_window(end, months)
+    rows = read_months(store_dir, start, end)
+    rows = rows[rows["settings_key"] == settings_key(settings)]
+
+    totals = rows.groupby(["nama", "role"], sort=True, observed=True).agg(
+        Months=("bulan", "nunique"), **{"Working Days": ("hari_kerja", "sum")},
+        **{kolom: (kategori, "sum") for kategori, kolom in COUNT_COLUMNS.items()},
+    ).reset_index().rename(columns={"nama": "Nama", "role": "Role"})
+
+    issues = totals["Tidak Absen"] + totals["Absen Tidak Lengkap"] + totals["Telat Masuk"] + totals["Pulang Cepat"]
+    totals.insert(2, "Performance", [
+        get_performance_badge(jumlah, hari)[1] for jumlah, hari in zip(issues, totals["Working Days"])
+    ])
+    return totals
@@ -0,0 +1,28 @@
+"""Role schedules and reporting period used by the recap engine."""
+
+from typing import NamedTuple
+
+DEFAULT_ROLE = "SMPSMK"
+
+DEFAULT_ROLE_SETTINGS = {
+    "SMPSMK": {"jam_masuk": "07:00", "jam_pulang": "15:00", "pulang_next_day": False},
+    "ASRAMA": {"jam_masuk": "15:00", "jam_pulang": "07:00", "pulang_next_day": True},
+    "MUSYRIF": {"jam_masuk": "15:00", "jam_pulang": "07:00", "pulang_next_day": True}
+}
+
+
+class Period(NamedTuple):
+    """Months covered by the sheet header (1-12) and their year"""
+    bulan_awal: int
+    bulan_akhir: int
+    tahun: int
+
+
+def normalize_role(role, role_settings):
+    """Map a raw role cell to one of the configured roles"""
+    role = role.strip().upper() if isinstance(role, str) else DEFAULT_ROLE
+
+    # Set default role if not in predefined roles
+    if role not in role_settings:
+        role = DEFAULT_ROLE
+    return role
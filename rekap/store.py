@@ -0,0 +1,251 @@
+"""Persistent columnar store of normalized punch events.
+
+Each stored sheet is normalized into long-format Parquet tables, so later
+recaps (with any schedule settings) and cross-month reports read just the
+columns and dates they need instead of re-parsing the workbook::
+
+    <store>/index.parquet                   one row per stored sheet: period, source, date range
+
+A sheet is keyed by its source (and sheet name) alone, so storing it again
+with another period replaces the earlier entry instead of adding a second.
+    <store>/<period_id>/events.parquet      one row per punch, or per holiday marker
+    <store>/<period_id>/employees.parquet   roster in sheet order, with the raw role
+    <store>/<period_id>/days.parquet        day columns in sheet order, NaT when undated
+"""
+
+import os
+import re
+import shutil
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from rekap.engine import classify_attendance, recap_frame, sheet_dates, sheet_employees
+from rekap.parsing import NO_PUNCH, grid_from_events, punch_events
+from rekap.profiling import NULL_TIMER
+from rekap.settings import normalize_role
+
+INDEX_COLUMNS = [
+    "period_id", "source", "tahun", "bulan_awal", "bulan_akhir",
+    "date_min", "date_max", "employees", "days", "events", "saved_at"
+]
+
+
+class StoredSheet(NamedTuple):
+    """The three tables of one stored sheet"""
+    employees: pd.DataFrame  # employee, nama, role
+    days: pd.DataFrame  # day, tanggal
+    events: pd.DataFrame  # employee, nama, role, tanggal, day, seq, menit, holiday
+
+
+def period_id(source, sheet=None):
+    """Directory name (and index key) of a sheet in the store: the workbook's source and, if given, sheet name.
+
+    ``source`` is the workbook's file name, or its path relative to the
+    folder a batch of workbooks was read from. The period is not part of the
+    key, so a sheet has a single entry whatever period it was stored with.
+    """
+    stem = os.path.splitext(source)[0]
+    if sheet is not None:
+        stem = f"{stem}_{sheet}"
+    return re.sub(r"[^\w.-]+", "_", stem)
+
+
+def source_name(source, sheet=None):
+    """Source of a sheet as listed in the index, e.g. ``unit.xlsx [Guru]``"""
+    name = source.replace(os.sep, "/")
+    return name if sheet is None else f"{name} [{sheet}]"
+
+
+def _check_ids(records, index):
+    """Refuse records whose period_id belongs to another source, instead of overwriting that sheet"""
+    pemilik = dict(zip(index["period_id"], index["source"]))
+    for record in records:
+        lain = pemilik.setdefault(record["period_id"], record["source"])
+        if lain != record["source"]:
+            raise ValueError(
+                f"{record['source']} and {lain} map to the same store entry {record['period_id']!r}; rename one of them"
+            )
+
+
+def normalize_sheet(frame, period):
+    """Turn a raw sheet into its employees, days and punch-event tables"""
+    tanggal_final = sheet_dates(frame, period)
+    nama_guru, role_guru, data_absensi = sheet_employees(frame, len(tanggal_final))
+    holiday, punches = punch_events(data_absensi)
+
+    employees = pd.DataFrame({
+        "employee": np.arange(len(nama_guru), dtype=np.int32),
+        "nama": pd.Series([str(nama) for nama in nama_guru], dtype=object),
+        "role": pd.Series([role if pd.isna(role) else str(role) for role in role_guru], dtype=object),
+    })
+    days = pd.DataFrame({
+        "day": np.arange(len(tanggal_final), dtype=np.int16),
+        "tanggal": pd.to_datetime(pd.Series(tanggal_final, dtype=object)),
+    })
+
+    # Holiday cells carry no punches; keep them as marker rows
+    rows, cols = np.nonzero(holiday)
+    libur = pd.DataFrame({
+        "row": rows.astype(np.int32), "col": cols.astype(np.int16),
+        "seq": np.zeros(len(rows), dtype=np.int16), "menit": np.full(len(rows), NO_PUNCH, dtype=np.int16),
+    })
+    events = pd.concat([punches.assign(holiday=False), libur.assign(holiday=True)], ignore_index=True)
+    events = events.sort_values(["row", "col", "seq"], kind="stable", ignore_index=True)
+    events = events.rename(columns={"row": "employee", "col": "day"})
+
+    employee = events["employee"].to_numpy()
+    events.insert(1, "nama", pd.Categorical(employees["nama"].to_numpy()[employee]))
+    events.insert(2, "role", pd.Categorical(employees["role"].to_numpy()[employee]))
+    events.insert(3, "tanggal", days["tanggal"].to_numpy()[events["day"].to_numpy()])
+
+    return StoredSheet(employees, days, events)
+
+
+def save_sheet(store_dir, frame, period, source, sheet_name=None):
+    """Write the tables of one sheet; returns its index record (see :func:`update_index`).
+
+    ``sheet_name`` tells apart the sheets of a workbook with several.
+    """
+    pid = period_id(source, sheet_name)
+    _check_ids([{"period_id": pid, "source": source_name(source, sheet_name)}], read_index(store_dir))
+    sheet = normalize_sheet(frame, period)
+    folder = os.path.join(store_dir, pid)
+    os.makedirs(folder, exist_ok=True)
+    for name, table in zip(StoredSheet._fields, sheet):
+        table.to_parquet(os.path.join(folder, f"{name}.parquet"), index=False)
+
+    return {
+        "period_id": pid,
+        "source": source_name(source, sheet_name),
+        "tahun": period.tahun,
+        "bulan_awal": period.bulan_awal,
+        "bulan_akhir": period.bulan_akhir,
+        "date_min": sheet.days["tanggal"].min(),
+        "date_max": sheet.days["tanggal"].max(),
+        "employees": len(sheet.employees),
+        "days": len(sheet.days),
+        "events": len(sheet.events),
+        "saved_at": pd.Timestamp.now(),
+    }
+
+
+def read_index(store_dir):
+    """The period index of a store; empty when nothing was stored yet"""
+    path = os.path.join(store_dir, "index.parquet")
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=INDEX_COLUMNS)
+    return pd.read_parquet(path)
+
+
+def latest_entries(index):
+    """Index rows with one row per source (and sheet): the one saved last.
+
+    Stores written before entries were keyed by source alone can hold the
+    same sheet under several periods; reports only count its latest one.
+    """
+    return index.sort_values("saved_at", kind="stable").drop_duplicates("source", keep="last").sort_index()
+
+
+def update_index(store_dir, records):
+    """Add or replace index records by period_id.
+
+    Older entries of the same source (e.g. stored under a period-prefixed id
+    by earlier versions) are replaced too, and their folders removed.
+    """
+    baru = pd.DataFrame(records, columns=INDEX_COLUMNS)
+    lama = read_index(store_dir)
+    _check_ids(records, lama)
+    diganti = lama["source"].isin(baru["source"]) & ~lama["period_id"].isin(baru["period_id"])
+    for pid in lama.loc[diganti, "period_id"]:
+        shutil.rmtree(os.path.join(store_dir, pid), ignore_errors=True)
+    lama = lama[~lama["period_id"].isin(baru["period_id"]) & ~diganti]
+    index = pd.concat([lama, baru], ignore_index=True) if len(lama) else baru
+    index = index.sort_values(["date_min", "period_id"], ignore_index=True)
+
+    # Replace atomically so readers never see a half-written index
+    path = os.path.join(store_dir, "index.parquet")
+    index.to_parquet(path + ".tmp", index=False)
+    os.replace(path + ".tmp", path)
+    return index
+
+
+def store_sheet(store_dir, frame, period, source, sheet_name=None):
+    """Normalize and store one sheet and index it; returns its period_id"""
+    os.makedirs(store_dir, exist_ok=True)
+    record = save_sheet(store_dir, frame, period, source, sheet_name)
+    update_index(store_dir, [record])
+    return record["period_id"]
+
+
+def load_sheet(store_dir, pid, columns=None):
+    """Read one stored sheet; ``columns`` limits the event columns read"""
+    folder = os.path.join(store_dir, pid)
+    return StoredSheet(
+        pd.read_parquet(os.path.join(folder, "employees.parquet")),
+        pd.read_parquet(os.path.join(folder, "days.parquet")),
+        pd.read_parquet(os.path.join(folder, "events.parquet"), columns=columns),
+    )
+
+
+def read_events(store_dir, start=None, end=None, columns=None):
+    """Punch events of every stored sheet between two dates (inclusive), with their period_id.
+
+    Only the sheets whose date range overlaps ``start``-``end`` are opened, and
+    only the requested ``columns`` are read.
+    """
+    index = read_index(store_dir)
+    filters = []
+    if start is not None:
+        start = pd.Timestamp(start)
+        index = index[index["date_max"] >= start]
+        filters.append(("tanggal", ">=", start))
+    if end is not None:
+        end = pd.Timestamp(end)
+        index = index[index["date_min"] <= end]
+        filters.append(("tanggal", "<=", end))
+    if columns is not None and filters and "tanggal" not in columns:
+        columns = [*columns, "tanggal"]
+
+    frames = [
+        pd.read_parquet(
+            os.path.join(store_dir, pid, "events.parquet"), columns=columns, filters=filters or None
+        ).assign(period_id=pid)
+        for pid in index["period_id"]
+    ]
+    if not frames:
+        return pd.DataFrame(columns=[*(columns or []), "period_id"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def sheet_grid(sheet):
+    """Names, raw roles, dates and PunchGrid of a stored sheet, as compute_recap sees them"""
+    nama_guru = sheet.employees["nama"].tolist()
+    role_guru = [None if pd.isna(role) else role for role in sheet.employees["role"]]
+    tanggal_final = [None if pd.isna(tgl) else tgl.to_pydatetime() for tgl in sheet.days["tanggal"]]
+
+    events = sheet.events
+    holiday = np.zeros((len(nama_guru), len(tanggal_final)), dtype=bool)
+    libur = events[events["holiday"]]
+    holiday[libur["employee"].to_numpy(), libur["day"].to_numpy()] = True
+
+    punches = events.loc[~events["holiday"], ["employee", "day", "seq", "menit"]]
+    grid = grid_from_events(holiday, punches.rename(columns={"employee": "row", "day": "col"}))
+    return nama_guru, role_guru, tanggal_final, grid
+
+
+def recap_stored(store_dir, pid, settings, progress=None, timer=NULL_TIMER):
+    """Recap a stored sheet with the given schedule settings, without the workbook"""
+    with timer.stage("load") as stage:
+        sheet = load_sheet(store_dir, pid, columns=["employee", "day", "seq", "menit", "holiday"])
+        nama_guru, role_guru, tanggal_final, grid = sheet_grid(sheet)
+        stage["rows"] = len(sheet.events)
+
+    with timer.stage("classify", rows=len(nama_guru)):
+        roles = [normalize_role(role, settings) for role in role_guru]
+        hari_kerja = np.array([tgl is not None for tgl in tanggal_final], dtype=bool)
+        masks, _ = classify_attendance(grid, roles, hari_kerja, settings)
+
+    with timer.stage("build", rows=len(nama_guru)):
+        return recap_frame(nama_guru, roles, masks, tanggal_final, progress)
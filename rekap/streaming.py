@@ -0,0 +1,116 @@
+"""Streaming recap: read, classify and write one chunk of employees at a time.
+
+For year-long, multi-thousand-employee exports the whole sheet never has to be
+in memory: rows are streamed from the workbook in read-only mode, classified in
+chunks of ``chunk_size`` employees and written straight to the CSV export, so
+peak memory is bounded by one chunk instead of the full sheet. Day columns are
+the ones covered by the date header row, widened to the widest data row seen
+so far with undated columns, as the full sheet has them in compute_recap.
+"""
+
+import csv
+import os
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from rekap.engine import (
+    FIRST_DAY_COL,
+    HEADER_ROW,
+    OVERNIGHT_ROLES,
+    RECAP_COLUMNS,
+    classify_attendance,
+    debug_records,
+    recap_rows,
+)
+from rekap.parsing import parse_grid, parse_tanggal_header
+from rekap.reader import iter_sheet_rows
+from rekap.settings import normalize_role
+
+# Columns of the CSV export (styling-only columns dropped)
+EXPORT_COLUMNS = [column for column in RECAP_COLUMNS if column != "Badge_Class"]
+
+
+def _employee_chunks(rows, chunk_size):
+    """Group data rows into chunks of (names, raw roles, day cells of each row).
+
+    Like compute_recap, the k-th non-empty name is paired with the k-th data
+    row, and trailing rows without a name are dropped.
+    """
+    nama_antri, baris_antri = deque(), deque()
+    nama_guru, role_guru, data_absensi = [], [], []
+
+    for row in rows:
+        cells = row[FIRST_DAY_COL:]
+        baris_antri.append((row[1] if len(row) > 1 else np.nan, cells))
+        if row and not pd.isna(row[0]):
+            nama_antri.append(row[0])
+
+        while nama_antri and baris_antri:
+            role, cells = baris_antri.popleft()
+            nama_guru.append(nama_antri.popleft())
+            role_guru.append(role)
+            data_absensi.append(cells)
+
+        if len(nama_guru) >= chunk_size:
+            yield nama_guru, role_guru, data_absensi
+            nama_guru, role_guru, data_absensi = [], [], []
+
+    if nama_guru:
+        yield nama_guru, role_guru, data_absensi
+
+
+def iter_recap(source, settings, period, sheet_name=0, chunk_size=256, debug_info=None, progress=None):
+    """Yield recap rows (dicts keyed by RECAP_COLUMNS) straight from a workbook.
+
+    Produces the same rows as :func:`rekap.engine.compute_recap` on the full
+    sheet. ``debug_info`` receives the incomplete records when a list is given,
+    and ``progress`` is called with ``(done, None)`` after each chunk since the
+    number of rows is not known up front.
+    """
+    rows = iter_sheet_rows(source, sheet_name, min_row=HEADER_ROW + 1)
+    header = next(rows, [])
+    tanggal_final = parse_tanggal_header(header[FIRST_DAY_COL:], period)
+    hari_kerja = np.array([tgl is not None for tgl in tanggal_final], dtype=bool)
+
+    selesai = 0
+    if progress is not None:
+        progress(selesai, None)
+    for nama_guru, role_guru, data_absensi in _employee_chunks(rows, chunk_size):
+        lebar = max([len(tanggal_final)] + [len(cells) for cells in data_absensi])
+        if lebar > len(tanggal_final):
+            # Cells right of the last header day are undated (e.g. the next morning of overnight roles)
+            tanggal_final = tanggal_final + [None] * (lebar - len(tanggal_final))
+            hari_kerja = np.array([tgl is not None for tgl in tanggal_final], dtype=bool)
+        block = np.full((len(data_absensi), lebar), np.nan, dtype=object)
+        for baris, cells in enumerate(data_absensi):
+            block[baris, :len(cells)] = cells
+
+        grid = parse_grid(block)
+        roles = [normalize_role(role, settings) for role in role_guru]
+        masks, catat_debug = classify_attendance(grid, roles, hari_kerja, settings)
+
+        if debug_info is not None:
+            overnight = [role in OVERNIGHT_ROLES for role in roles]
+            debug_info.extend(debug_records(catat_debug, grid, block, nama_guru, roles, overnight, tanggal_final))
+
+        yield from recap_rows(nama_guru, roles, masks, tanggal_final)
+        selesai += len(nama_guru)
+        if progress is not None:
+            progress(selesai, None)
+
+
+def write_recap_csv(rows, target):
+    """Write recap rows to a CSV path or text buffer as they arrive; returns the row count"""
+    if isinstance(target, (str, os.PathLike)):
+        with open(target, "w", newline="", encoding="utf-8") as handle:
+            return write_recap_csv(rows, handle)
+
+    writer = csv.DictWriter(target, fieldnames=EXPORT_COLUMNS, extrasaction="ignore", lineterminator=os.linesep)
+    writer.writeheader()
+    jumlah = 0
+    for row in rows:
+        writer.writerow(row)
+        jumlah += 1
+    return jumlah
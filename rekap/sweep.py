@@ -0,0 +1,68 @@
+"""What-if sweeps: late and early counts over a range of schedule cutoffs.
+
+The check-in and check-out minutes of every complete shift do not depend on
+the schedule (see :func:`rekap.engine.classify_shifts`), so each role's times
+are sorted once and a single ``searchsorted`` answers every cutoff at once,
+instead of one full recap per candidate time.
+"""
+
+import numpy as np
+import pandas as pd
+
+from rekap.parsing import jam_ke_menit, menit_ke_jam
+
+SWEEP_COLUMNS = ["Role", "Issue", "Cutoff", "Minutes", "Count", "Current"]
+
+
+def cutoff_range(jam, span=30, step=5):
+    """Cutoff minutes from ``span`` minutes before to ``span`` after an HH:MM time"""
+    menit = jam_ke_menit(jam)
+    cutoffs = np.arange(menit - span, menit + span + 1, step)
+    return cutoffs[(cutoffs >= 0) & (cutoffs < 24 * 60)]
+
+
+def count_after(times, cutoffs):
+    """How many ``times`` are later than each cutoff"""
+    ordered = np.sort(times)
+    return len(ordered) - np.searchsorted(ordered, cutoffs, side="right")
+
+
+def count_before(times, cutoffs):
+    """How many ``times`` are earlier than each cutoff"""
+    return np.searchsorted(np.sort(times), cutoffs, side="left")
+
+
+def threshold_sweep(shifts, roles, settings, span=30, step=5):
+    """Late check-ins and early check-outs per role for every cutoff around its schedule.
+
+    ``shifts`` is the :class:`rekap.classify.ShiftTimes` of a sheet and
+    ``roles`` its normalized role per row. Counts match what the recap would
+    report with that cutoff; ``Current`` marks the cutoff in ``settings``.
+    """
+    roles = np.asarray(roles, dtype=object)
+    frames = []
+    for role, jadwal in settings.items():
+        lengkap = shifts.lengkap & (roles == role)[:, None]
+        for issue, field, times, count in (
+            ("Telat Masuk", "jam_masuk", shifts.masuk[lengkap], count_after),
+            ("Pulang Cepat", "jam_pulang", shifts.pulang[lengkap], count_before),
+        ):
+            cutoffs = cutoff_range(jadwal[field], span, step)
+            frames.append(pd.DataFrame({
+                "Role": role,
+                "Issue": issue,
+                "Cutoff": [menit_ke_jam(menit) for menit in cutoffs],
+                "Minutes": cutoffs,
+                "Count": count(times, cutoffs),
+                "Current": cutoffs == jam_ke_menit(jadwal[field]),
+            }))
+    if not frames:
+        return pd.DataFrame(columns=SWEEP_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def merge_sweeps(sweeps):
+    """Sweeps of several sheets recapped with the same settings, counts added up per cutoff"""
+    frame = pd.concat(sweeps, ignore_index=True)
+    keys = [column for column in SWEEP_COLUMNS if column != "Count"]
+    return frame.groupby(keys, sort=False, as_index=False)["Count"].sum()[SWEEP_COLUMNS]